@@ -0,0 +1,369 @@
+"""语音识别引擎基准测试
+
+把一组录好的 WAV 文件依次送入各个识别引擎，输出实时率、说完到出字的延迟、
+CPU 时间、内存峰值和字错误率（CER），结果为 JSON，便于比较和复现。
+
+语料目录中每个 16kHz 16 位单声道的 <name>.wav 对应一个参考文本 <name>.txt。
+azure 引擎默认请求本地模拟服务（按参考文本返回结果，只衡量链路开销），
+传入 --azure-endpoint 和 --azure-key 时请求真实的短音频识别 REST 接口。
+
+用法（在项目根目录）：
+    PYTHONPATH=src python -m benchmarks.asr_bench corpus/ --engines vosk azure --output asr.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import threading
+import time
+import unicodedata
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def normalize_transcript(text: str) -> str:
+    """去掉空白和标点，只比较文字本身"""
+    return "".join(
+        ch for ch in unicodedata.normalize('NFKC', text)
+        if not ch.isspace() and not unicodedata.category(ch).startswith('P')
+    ).lower()
+
+
+def edit_distance(reference: str, hypothesis: str) -> int:
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_ch in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_ch in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_ch != hyp_ch)))
+        previous = current
+    return previous[-1]
+
+
+def load_corpus(corpus_dir: str) -> List[Dict[str, object]]:
+    items = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith('.wav'):
+            continue
+        path = os.path.join(corpus_dir, name)
+        transcript_path = path[:-4] + '.txt'
+        if not os.path.exists(transcript_path):
+            continue
+        with open(transcript_path, encoding='utf-8') as f:
+            reference = f.read().strip()
+        with wave.open(path, 'rb') as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        items.append({"name": name, "path": path, "reference": reference, "duration": duration})
+    return items
+
+
+class BenchRecognizer:
+    """基准中各引擎的统一接口"""
+
+    name = ""
+
+    def transcribe(self, path: str, duration: float) -> Tuple[str, Optional[float]]:
+        """识别一个文件
+
+        Returns:
+            (识别文本, 语音结束到最终结果的延迟秒数，无法测量时为 None)
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class VoskBench(BenchRecognizer):
+    """vosk 流式识别：文件通过 WavFileSource 模拟麦克风实时送入"""
+
+    name = "vosk"
+
+    def __init__(self, realtime: bool):
+        from services.audio_capture import AudioCapture, WavFileSource
+        from services.vosk_stt import ChineseVoiceRecognizer
+        self._capture_cls = AudioCapture
+        self._source_cls = WavFileSource
+        self.realtime = realtime
+        self.recognizer = ChineseVoiceRecognizer(capture=AudioCapture(_SilentSource()))
+
+    def transcribe(self, path: str, duration: float) -> Tuple[str, Optional[float]]:
+        source = self._source_cls(path, realtime=self.realtime)
+        self.recognizer.capture = self._capture_cls(source, capacity_seconds=source.duration + 1)
+        self.recognizer.reader = None
+        self.recognizer.vad.reset()
+
+        started = time.perf_counter()
+        parts = []
+        last_text_at = started
+        while True:
+            text = self.recognizer.get_speech_text(timeout=0.5)
+            if text:
+                parts.append(text)
+                last_text_at = time.perf_counter()
+            elif source.finished.is_set():
+                break
+        source.stop()
+        if not self.realtime:
+            # 音频不按实时速度送入时，说完的时刻没有意义
+            return "".join(parts), None
+        return "".join(parts), max(0.0, last_text_at - (started + duration))
+
+
+class PaddleBench(BenchRecognizer):
+    """PaddleSpeech 离线识别：整段文件识别完成才有结果"""
+
+    name = "paddle"
+
+    def __init__(self):
+        import paddlespeech.cli.asr as asr
+        self.executor = asr.ASRExecutor()
+
+    def transcribe(self, path: str, duration: float) -> Tuple[str, float]:
+        started = time.perf_counter()
+        text = self.executor(audio_file=path, model='conformer_wenetspeech', lang='zh',
+                             sample_rate=16000, force_yes=True)
+        return text, time.perf_counter() - started
+
+
+class AzureRestBench(BenchRecognizer):
+    """Azure 短音频识别 REST 接口，整段上传后等待结果"""
+
+    name = "azure"
+
+    def __init__(self, endpoint: str, key: str):
+        self.url = f"{endpoint.rstrip('/')}/speech/recognition/conversation/cognitiveservices/v1"
+        self.client = httpx.Client(timeout=30, headers={
+            'Ocp-Apim-Subscription-Key': key,
+            'Content-Type': 'audio/wav; codecs=audio/pcm; samplerate=16000',
+            'Accept': 'application/json',
+        })
+
+    def transcribe(self, path: str, duration: float) -> Tuple[str, float]:
+        with open(path, 'rb') as f:
+            body = f.read()
+        started = time.perf_counter()
+        response = self.client.post(self.url, params={'language': 'zh-CN', 'format': 'simple'},
+                                     content=body, headers={'X-Bench-File': os.path.basename(path)})
+        response.raise_for_status()
+        result = response.json()
+        return result.get('DisplayText', ''), time.perf_counter() - started
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class _SilentSource:
+    """占位的空音频源，真正的文件源在每次识别时替换"""
+    sample_rate = 16000
+
+    def start(self, on_audio) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+def _run_azure_stub(port: int, corpus_dir: str, seconds_per_audio_second: float, ready) -> None:
+    """模拟 Azure 短音频识别接口：按上传文件名返回参考文本"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            name = self.headers.get('X-Bench-File', '')
+            transcript_path = os.path.join(corpus_dir, name[:-4] + '.txt')
+            text = ''
+            if name.endswith('.wav') and os.path.exists(transcript_path):
+                with open(transcript_path, encoding='utf-8') as f:
+                    text = f.read().strip()
+            # 按音频时长模拟服务端的处理时间
+            time.sleep(max(0, len(body) - 44) / 32000 * seconds_per_audio_second)
+            payload = json.dumps({"RecognitionStatus": "Success", "DisplayText": text},
+                                 ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    ready.set()
+    server.serve_forever()
+
+
+class ResourceMonitor:
+    """采样本进程的内存峰值"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "ResourceMonitor":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _sample(self) -> None:
+        if psutil is not None:
+            rss = psutil.Process().memory_info().rss
+        else:
+            # 没有 psutil 时只能取进程生命周期内的峰值（Linux 单位为 KB）
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+def run_engine(engine: BenchRecognizer, corpus: List[Dict[str, object]], load_s: float) -> Dict[str, object]:
+    files = []
+    errors = 0
+    reference_chars = 0
+    latencies = []
+    wall = 0.0
+    cpu_start = time.process_time()
+    with ResourceMonitor() as monitor:
+        for item in corpus:
+            started = time.perf_counter()
+            text, latency = engine.transcribe(item["path"], item["duration"])
+            elapsed = time.perf_counter() - started
+            wall += elapsed
+            reference = normalize_transcript(item["reference"])
+            distance = edit_distance(reference, normalize_transcript(text))
+            errors += distance
+            reference_chars += len(reference)
+            if latency is not None:
+                latencies.append(latency)
+            files.append({
+                "name": item["name"],
+                "duration_s": round(item["duration"], 3),
+                "text": text,
+                "cer": round(distance / max(1, len(reference)), 4),
+                "latency_ms": round(latency * 1000, 1) if latency is not None else None,
+                "wall_s": round(elapsed, 3),
+            })
+    cpu = time.process_time() - cpu_start
+    audio = sum(item["duration"] for item in corpus)
+    return {
+        "engine": engine.name,
+        "load_s": round(load_s, 3),
+        "audio_s": round(audio, 3),
+        "wall_s": round(wall, 3),
+        "rtf": round(wall / audio, 4) if audio else None,
+        "cpu_s": round(cpu, 3),
+        "cpu_rtf": round(cpu / audio, 4) if audio else None,
+        "rss_peak_mb": round(monitor.peak_rss / 1024 / 1024, 1),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "p95": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        },
+        "cer": round(errors / max(1, reference_chars), 4),
+        "files": files,
+    }
+
+
+def create_engine(name: str, args: argparse.Namespace) -> BenchRecognizer:
+    if name == 'vosk':
+        return VoskBench(realtime=not args.fast)
+    if name == 'paddle':
+        return PaddleBench()
+    if name == 'azure':
+        return AzureRestBench(args.azure_endpoint, args.azure_key)
+    raise ValueError(f"Unknown engine: {name}")
+
+
+def main(args: argparse.Namespace) -> Dict[str, object]:
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No <name>.wav + <name>.txt pairs found in {args.corpus}")
+
+    stub = None
+    if 'azure' in args.engines and not args.azure_endpoint:
+        ready = multiprocessing.Event()
+        # 模拟服务放在子进程中，不计入被测进程的 CPU 时间
+        stub = multiprocessing.Process(
+            target=_run_azure_stub, args=(args.stub_port, args.corpus, args.stub_delay, ready), daemon=True
+        )
+        stub.start()
+        ready.wait(10)
+        args.azure_endpoint = f"http://127.0.0.1:{args.stub_port}"
+
+    report = {
+        "corpus": os.path.abspath(args.corpus),
+        "files": len(corpus),
+        "audio_s": round(sum(item["duration"] for item in corpus), 3),
+        "settings": {
+            "fast": args.fast,
+            "azure_stub": stub is not None,
+            "stub_delay": args.stub_delay if stub is not None else None,
+        },
+        "engines": [],
+    }
+    try:
+        for name in args.engines:
+            started = time.perf_counter()
+            try:
+                engine = create_engine(name, args)
+            except Exception as e:
+                # 缺少模型或依赖的引擎跳过，不影响其他引擎
+                report["engines"].append({"engine": name, "error": f"{type(e).__name__}: {e}"})
+                continue
+            load_s = time.perf_counter() - started
+            try:
+                result = run_engine(engine, corpus, load_s)
+            finally:
+                engine.close()
+            report["engines"].append(result)
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.join()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus', help='包含 <name>.wav 和 <name>.txt 的目录')
+    parser.add_argument('--engines', nargs='+', default=['vosk', 'paddle', 'azure'])
+    parser.add_argument('--output', help='JSON 结果写入的文件')
+    parser.add_argument('--fast', action='store_true', help='流式引擎不按实时速度送入音频')
+    parser.add_argument('--azure-endpoint', help='真实服务地址，例如 https://eastasia.stt.speech.microsoft.com')
+    parser.add_argument('--azure-key', default='stub')
+    parser.add_argument('--stub-port', type=int, default=18765)
+    parser.add_argument('--stub-delay', type=float, default=0.1, help='模拟服务每秒音频的处理时间')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(parse_args())
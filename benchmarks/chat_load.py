@@ -0,0 +1,159 @@
+"""ChatBot 离线负载测试
+
+启动进程内的模拟 OpenAI 兼容服务，让 N 个并发 ChatBot 会话按脚本对话，
+走真实的客户端、连接池、调度器和聊天记录写入路径，报告每秒完成的轮次、
+首字与整轮延迟分位数，以及每个会话占用的内存，用于跟踪不同版本间的性能变化。
+
+用法（在项目根目录）：
+    PYTHONPATH=src python -m benchmarks.chat_load --sessions 1 8 32 --output chat_load.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.mock_openai import add_mock_arguments, mock_config_from_args, start_mock_server
+
+DEFAULT_SCRIPT = [
+    "你好，最近怎么样？",
+    "今天工作忙吗？",
+    "给我讲讲你最近在学什么。",
+    "周末有什么安排？",
+    "推荐一本你喜欢的书吧。",
+    "好的，谢谢，下次再聊。",
+]
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * percentile))] * 1000, 1)
+
+
+async def _run_session(chatbot, script: List[str], turn_latencies: List[float],
+                       ttfts: List[float], errors: List[str]) -> None:
+    from chatbot import ChatBotError
+
+    for user_input in script:
+        start = time.perf_counter()
+        first = None
+        try:
+            async for _ in chatbot.chat_stream(user_input):
+                if first is None:
+                    first = time.perf_counter() - start
+        except ChatBotError as e:
+            errors.append(str(e))
+            continue
+        turn_latencies.append(time.perf_counter() - start)
+        if first is not None:
+            ttfts.append(first)
+
+
+async def run_level(bot, store, sessions: int, script: List[str], character_id: str,
+                    measure_memory: bool) -> Dict[str, object]:
+    from chatbot import ChatBot
+
+    gc.collect()
+    before = tracemalloc.take_snapshot() if measure_memory else None
+    chatbots = [ChatBot(character_id, store=store, bot=bot) for _ in range(sessions)]
+
+    turn_latencies: List[float] = []
+    ttfts: List[float] = []
+    errors: List[str] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _run_session(chatbot, script, turn_latencies, ttfts, errors) for chatbot in chatbots
+    ))
+    elapsed = time.perf_counter() - start
+    for chatbot in chatbots:
+        await chatbot.compactor.wait()
+    store.flush()
+
+    result = {
+        "sessions": sessions,
+        "turns": len(turn_latencies),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(len(turn_latencies) / elapsed, 2),
+        "ttft_ms": {"p50": _percentile(ttfts, 0.5), "p95": _percentile(ttfts, 0.95),
+                    "p99": _percentile(ttfts, 0.99)},
+        "turn_ms": {"p50": _percentile(turn_latencies, 0.5), "p95": _percentile(turn_latencies, 0.95),
+                    "p99": _percentile(turn_latencies, 0.99)},
+    }
+    if measure_memory:
+        gc.collect()
+        # 会话仍然存活，差值即这些会话连同对话历史占用的内存
+        growth = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+        result["memory_per_session_kb"] = round(growth / sessions / 1024, 1)
+    del chatbots
+    return result
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, object]]:
+    runner, base_url = await start_mock_server(mock_config_from_args(args))
+    # 在创建后端之前配置，让客户端连到模拟服务，并发上限不成为瓶颈
+    os.environ['DEEPSEEK_BASE_URL'] = base_url
+    os.environ['DEEPSEEK_MAX_IN_FLIGHT'] = str(args.max_in_flight or max(args.sessions))
+
+    from models.chat_store import ChatLogStore
+    from services.deep_seek import Deepseekbot
+    from services.http_pool import close_http_clients
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            script = [line.strip() for line in f if line.strip()]
+
+    if args.memory:
+        tracemalloc.start()
+    results = []
+    with tempfile.TemporaryDirectory() as log_dir:
+        store = ChatLogStore(Path(log_dir))
+        bot = Deepseekbot()
+        stats = runner.app['stats']
+        try:
+            # 预热：导入、角色加载和建立连接不计入第一档的结果
+            await run_level(bot, store, 1, script[:1], args.character, measure_memory=False)
+            for sessions in args.sessions:
+                requests, errors = stats.requests, stats.errors
+                result = await run_level(bot, store, sessions, script, args.character, args.memory)
+                # 客户端会自动重试，注入的错误不一定体现为失败的轮次
+                result["mock_requests"] = stats.requests - requests
+                result["mock_errors"] = stats.errors - errors
+                print(json.dumps(result, ensure_ascii=False))
+                results.append(result)
+        finally:
+            store.close()
+            await close_http_clients()
+            await runner.cleanup()
+            if args.memory:
+                tracemalloc.stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"settings": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--character', default='li_ming')
+    parser.add_argument('--script', help='对话脚本，每行一句用户输入')
+    parser.add_argument('--max-in-flight', type=int, help='后端并发上限，默认等于最大会话数')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='不用 tracemalloc 统计内存（它会拖慢吞吐量）')
+    parser.add_argument('--output', help='JSON 结果写入的文件')
+    add_mock_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
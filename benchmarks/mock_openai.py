@@ -0,0 +1,138 @@
+"""本地模拟的 OpenAI 兼容聊天服务
+
+按配置的首字延迟和生成速率返回文本，可以按比例注入错误，用于在没有真实模型时
+测试吞吐量和延迟。Ollama 的 /v1 接口与 OpenAI 兼容，也可以用它代替。
+
+单独运行（代替本地 Ollama）：
+    python -m benchmarks.mock_openai --port 11434 --tokens-per-s 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from aiohttp import web
+
+REPLY_PIECES = ["好的", "，", "我", "明白", "你的", "意思", "了", "。", "我们", "继续", "聊", "吧", "！"]
+
+
+@dataclass
+class MockConfig:
+    first_token_delay: float = 0.2
+    tokens_per_s: float = 50.0
+    reply_tokens: int = 40
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: Optional[int] = 0
+
+
+class MockStats:
+    def __init__(self):
+        self.requests = 0
+        self.streams = 0
+        self.errors = 0
+
+
+def create_mock_app(config: MockConfig) -> web.Application:
+    app = web.Application()
+    app['config'] = config
+    app['stats'] = MockStats()
+    app['random'] = random.Random(config.seed)
+    app.router.add_get('/v1/models', handle_models)
+    app.router.add_post('/v1/chat/completions', handle_chat)
+    return app
+
+
+async def handle_models(request: web.Request) -> web.Response:
+    return web.json_response({"object": "list", "data": [{"id": "mock", "object": "model"}]})
+
+
+async def handle_chat(request: web.Request) -> web.StreamResponse:
+    config: MockConfig = request.app['config']
+    stats: MockStats = request.app['stats']
+    body = await request.json()
+    stats.requests += 1
+
+    if request.app['random'].random() < config.error_rate:
+        stats.errors += 1
+        return web.json_response(
+            {"error": {"message": "injected error", "type": "server_error"}}, status=config.error_status
+        )
+
+    tokens = config.reply_tokens
+    if body.get('max_tokens'):
+        tokens = min(tokens, body['max_tokens'])
+    pieces = [REPLY_PIECES[i % len(REPLY_PIECES)] for i in range(tokens)]
+    interval = 1 / config.tokens_per_s if config.tokens_per_s > 0 else 0
+    created = int(time.time())
+
+    if not body.get('stream'):
+        await asyncio.sleep(config.first_token_delay + interval * max(0, tokens - 1))
+        return web.json_response({
+            "id": "chatcmpl-mock", "object": "chat.completion", "created": created, "model": body.get('model'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(pieces)},
+                         "finish_reason": "stop"}],
+        })
+
+    stats.streams += 1
+    response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+    await response.prepare(request)
+    await asyncio.sleep(config.first_token_delay)
+    for i, piece in enumerate(pieces):
+        if i and interval:
+            await asyncio.sleep(interval)
+        chunk = {
+            "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": body.get('model'),
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+        }
+        await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+    await response.write(b"data: [DONE]\n\n")
+    return response
+
+
+async def start_mock_server(config: MockConfig, host: str = '127.0.0.1',
+                            port: int = 0) -> Tuple[web.AppRunner, str]:
+    """启动模拟服务，返回 runner 和 /v1 接口地址"""
+    app = create_mock_app(config)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}/v1"
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--first-token-delay', type=float, default=0.2)
+    parser.add_argument('--tokens-per-s', type=float, default=50.0)
+    parser.add_argument('--reply-tokens', type=int, default=40)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def mock_config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        first_token_delay=args.first_token_delay,
+        tokens_per_s=args.tokens_per_s,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    add_mock_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    web.run_app(create_mock_app(mock_config_from_args(args)), host=args.host, port=args.port)
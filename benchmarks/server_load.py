@@ -0,0 +1,118 @@
+"""多会话聊天服务负载测试
+
+用固定延迟的模拟后端启动进程内服务，逐级增加并发会话数，
+测量每秒完成的轮次。并发会话之间不串行时，吞吐量应随并发数近似线性增长。
+
+用法（在项目根目录）：
+    PYTHONPATH=src python -m benchmarks.server_load --levels 1 4 16 --turns 5
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from aiohttp import ClientSession, web
+
+from models.chat_store import ChatLogStore
+from server.chat_server import create_app
+from services.base_ai import AbstractChatBot
+
+
+class SimulatedChatBot(AbstractChatBot):
+    """按固定首字延迟和生成速率返回文本的模拟后端"""
+
+    def __init__(self, first_token_delay: float, tokens: int, token_interval: float):
+        self.first_token_delay = first_token_delay
+        self.tokens = tokens
+        self.token_interval = token_interval
+        super().__init__()
+
+    def get_client(self):
+        return None
+
+    def get_model_name(self) -> str:
+        return "simulated"
+
+    async def send_message(self, messages, temperature: float = 1.3, max_tokens: Optional[int] = None, **kwargs) -> str:
+        return "".join([delta async for delta in self.stream_message(messages, temperature, max_tokens)])
+
+    async def stream_message(self, messages, temperature: float = 1.3, max_tokens: Optional[int] = None,
+                             **kwargs) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_delay)
+        for i in range(self.tokens):
+            if i:
+                await asyncio.sleep(self.token_interval)
+            yield "好" if i % 8 else "。"
+
+
+async def _run_client(http: ClientSession, base_url: str, turns: int, latencies: List[float]) -> None:
+    async with http.post(f"{base_url}/sessions", json={}) as resp:
+        session = await resp.json()
+    session_id = session['session_id']
+    headers = {'X-Session-Token': session['token']}
+    for i in range(turns):
+        start = time.perf_counter()
+        async with http.post(f"{base_url}/sessions/{session_id}/messages", json={"text": f"第{i}句话"},
+                             headers=headers) as resp:
+            async for _ in resp.content:
+                pass
+        latencies.append(time.perf_counter() - start)
+    await http.delete(f"{base_url}/sessions/{session_id}", headers=headers)
+
+
+async def run_level(base_url: str, sessions: int, turns: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    async with ClientSession() as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(_run_client(http, base_url, turns, latencies) for _ in range(sessions)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, float]]:
+    bot = SimulatedChatBot(args.first_token_delay, args.tokens, args.token_interval)
+    results = []
+    # 测试会话写入临时目录，不污染本地聊天记录
+    with tempfile.TemporaryDirectory() as log_dir:
+        store = ChatLogStore(Path(log_dir))
+        runner = web.AppRunner(create_app(bot, store=store))
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+
+        try:
+            for level in args.levels:
+                result = await run_level(base_url, level, args.turns)
+                print(json.dumps(result, ensure_ascii=False))
+                results.append(result)
+        finally:
+            await runner.cleanup()
+            store.close()
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--turns', type=int, default=5)
+    parser.add_argument('--first-token-delay', type=float, default=0.2)
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--token-interval', type=float, default=0.005)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
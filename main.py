@@ -1,16 +1,29 @@
 import signal
 import asyncio
 import sys
-from typing import Optional
-from character.loader import CharacterLoader
+import time
+from typing import Callable, Dict, Optional
+from character.loader import get_character_registry
+from config.config_manager import config_manager
+from services.chat_service import get_selected_bot
 from services.factory import get_voice_detector, get_speech_instance
+from services.http_pool import close_http_clients
+from services.speech_pipeline import SpeechPipeline
+from services.tracing import get_tracer
 from src.chatbot import ChatBot, ChatBotError
+from utils import get_logger
+
+logger = get_logger("main")
 
 
 class ChatInterface:
     def __init__(self):
         self.running = True
-        self.chatbot = ChatBot('wang_yonghua')
+        self.created = time.perf_counter()
+        self.chatbot = None
+        self.speaker = None
+        self._prewarm_task = None
+        self._barge_in = asyncio.Event()
         self.commands = {
             'quit': self.quit_chat,
             'clear': self.clear_history,
@@ -26,12 +39,25 @@ class ChatInterface:
 
     async def start(self):
         """启动聊天界面"""
+        config_manager.start_watching()
+        listenner = await self.warm_up()
+        speaker = self.speaker
         self.show_welcome_message()
-        listenner = get_voice_detector()
-        speaker = get_speech_instance()
+        self.prewarm_speech()
+        listen_task = None
         while self.running:
             try:
-                user_input = listenner.get_speech_text()
+                # 上一轮播放期间已经在听，直接等待那一次的识别结果
+                if listen_task is None:
+                    listen_task = self.listen(listenner)
+                try:
+                    user_input = await listen_task
+                except Exception as e:
+                    # 识别器已放弃重连，没有输入来源了
+                    print(f"语音识别失败: {str(e)}")
+                    break
+                finally:
+                    listen_task = None
                 if not user_input:
                     continue
                 # 检查是否是命令
@@ -42,12 +68,14 @@ class ChatInterface:
                         break
                     continue
 
-                # 发送消息并获取响应
-                response = await self.chatbot.chat(user_input)
-                if response:
-                    self.display_response(response)
-                    speaker.play_sound(response)
-                else:
+                # 发送消息，边生成边显示，并逐句合成播放
+                if config_manager.settings.barge_in:
+                    listen_task = self.listen(listenner)
+                with get_tracer().span("turn_total"):
+                    response = await self.speak_response(user_input, speaker)
+                if response is None:
+                    print("\n（已打断）")
+                elif not response:
                     print("抱歉，获取响应时出现错误。")
 
             except KeyboardInterrupt:
@@ -58,6 +86,116 @@ class ChatInterface:
             except Exception as e:
                 print(f"意外错误: {str(e)}")
 
+        if listen_task is not None:
+            listen_task.cancel()
+        await listenner.stop()
+        speaker.player.close()
+        await close_http_clients()
+        config_manager.stop_watching()
+        get_tracer().dump(config_manager.get_config_value('TRACE_DUMP_PATH', ''))
+
+    async def warm_up(self):
+        """并行初始化语音识别、语音合成、角色和模型连接，返回已开始识别的检测器"""
+        timings: Dict[str, float] = {}
+
+        async def timed(stage: str, awaitable):
+            started = time.perf_counter()
+            result = await awaitable
+            timings[stage] = time.perf_counter() - started
+            return result
+
+        async def prepare_listener():
+            listenner = await asyncio.to_thread(get_voice_detector)
+            await listenner.start()
+            return listenner
+
+        async def prepare_speaker():
+            speaker = await asyncio.to_thread(get_speech_instance)
+            await asyncio.to_thread(speaker.player.start)
+            return speaker
+
+        async def prepare_chatbot():
+            bot = await asyncio.to_thread(get_selected_bot)
+            # 角色加载与建立模型连接互不依赖
+            chatbot, _ = await asyncio.gather(
+                timed("character", asyncio.to_thread(self.create_chatbot, bot)),
+                timed("llm", bot.warm_up())
+            )
+            return chatbot
+
+        listenner, self.speaker, self.chatbot = await asyncio.gather(
+            timed("asr", prepare_listener()),
+            timed("tts", prepare_speaker()),
+            prepare_chatbot()
+        )
+        timings["first_listen"] = time.perf_counter() - self.created
+        self.report_startup(timings)
+        return listenner
+
+    @staticmethod
+    def create_chatbot(bot) -> ChatBot:
+        """加载默认角色，按配置恢复上次的会话"""
+        chatbot = ChatBot('wang_yonghua', bot=bot)
+        if config_manager.get_config_value('RESUME_LAST_SESSION', 'true').lower() == 'true':
+            chatbot.resume_session()
+        return chatbot
+
+    @staticmethod
+    def report_startup(timings: Dict[str, float]) -> None:
+        """记录启动各环节的耗时，各环节并行进行，总耗时取决于最慢的一个"""
+        tracer = get_tracer()
+        for stage, seconds in timings.items():
+            tracer.record(f"startup_{stage}", seconds)
+        logger.info("Startup: " + ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in timings.items()))
+
+    def listen(self, listenner) -> asyncio.Future:
+        """等待识别下一句话，识别到足够长的中间结果即视为用户开口"""
+        return asyncio.ensure_future(listenner.listen(self._on_partial_speech))
+
+    def _on_partial_speech(self, text: str) -> None:
+        if len(text) >= config_manager.settings.barge_in_min_chars:
+            self._barge_in.set()
+
+    async def speak_response(self, user_input: str, speaker) -> Optional[str]:
+        """流式生成并朗读回复；用户在此期间开口时立即停止，返回 None"""
+        self._barge_in = asyncio.Event()
+        pipeline = SpeechPipeline(speaker)
+        pipeline.start()
+
+        async def respond() -> str:
+            try:
+                response = await self.stream_response(user_input, pipeline.feed, auto_commit=False)
+            except BaseException:
+                await pipeline.cancel()
+                raise
+            await pipeline.finish()
+            # 播放完毕才写入历史，播放途中被打断时只记录说出口的部分
+            self.chatbot.commit_reply(response)
+            return response
+
+        reply = asyncio.create_task(respond())
+        barge_in = asyncio.create_task(self._barge_in.wait())
+        try:
+            await asyncio.wait([reply, barge_in], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            barge_in.cancel()
+            if not reply.done():
+                # 取消生成会关闭模型流，随后停止合成与播放
+                reply.cancel()
+                await asyncio.gather(reply, return_exceptions=True)
+                await pipeline.cancel()
+
+        if reply.cancelled():
+            self.chatbot.commit_reply(pipeline.spoken_text())
+            return None
+        return reply.result()
+
+    def prewarm_speech(self):
+        """后台预先合成当前角色的常用语"""
+        phrases = self.chatbot.character.get_common_phrases()
+        if phrases:
+            self._prewarm_task = asyncio.create_task(asyncio.to_thread(self.speaker.prewarm, phrases))
+
     def show_welcome_message(self):
         """显示欢迎信息"""
         welcome_text = f"""
@@ -81,6 +219,19 @@ class ChatInterface:
         """显示 AI 响应"""
         print("\nAI:", response)
 
+    async def stream_response(self, user_input: str, on_delta: Optional[Callable[[str], None]] = None,
+                              auto_commit: bool = True) -> str:
+        """边生成边显示 AI 响应，返回完整文本"""
+        parts = []
+        print("\nAI:", end=" ", flush=True)
+        async for delta in self.chatbot.chat_stream(user_input, auto_commit=auto_commit):
+            print(delta, end="", flush=True)
+            parts.append(delta)
+            if on_delta:
+                on_delta(delta)
+        print()
+        return "".join(parts)
+
     async def clear_history(self) -> bool:
         """清除对话历史"""
         try:
@@ -93,16 +244,13 @@ class ChatInterface:
     async def switch_character(self) -> bool:
         """切换角色"""
         try:
-            character_loader = CharacterLoader()
-            character_loader.load_all_characters()
-            # 获取可用角色列表
-            available_characters = list(character_loader.characters.keys())
+            # 获取可用角色列表（只读取角色名）
+            characters = get_character_registry().list_characters()
+            available_characters = list(characters.keys())
 
             print("\n可用角色:")
             for i, char_id in enumerate(available_characters, 1):
-                char_data = character_loader.get_character(char_id)
-                name = char_data.get('name', char_id)
-                print(f"{i}. {name} ({char_id})")
+                print(f"{i}. {characters[char_id]} ({char_id})")
 
             choice = input("\n请选择角色编号 (默认为1): ") or "1"
             try:
@@ -110,6 +258,7 @@ class ChatInterface:
                 if 0 <= index < len(available_characters):
                     character_id = available_characters[index]
                     self.chatbot.load_character(character_id)
+                    self.prewarm_speech()
                     print(f"已切换到角色: {character_id}")
                 else:
                     print("无效的选择")
@@ -147,8 +296,8 @@ class ChatInterface:
 def main():
     """主函数"""
     # 检查 Python 版本
-    if sys.version_info < (3, 7):
-        print("Error: Python 3.7 or higher is required.")
+    if sys.version_info < (3, 9):
+        print("Error: Python 3.9 or higher is required.")
         sys.exit(1)
 
     # 创建并启动聊天界面
@@ -0,0 +1,15 @@
+import sys
+from server.chat_server import run_server
+
+
+def main():
+    """启动多会话聊天服务"""
+    if sys.version_info < (3, 7):
+        print("Error: Python 3.7 or higher is required.")
+        sys.exit(1)
+
+    run_server()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,53 @@
 # src/character/character.py
 from typing import Optional, List
-from .loader import CharacterLoader
-from .prompt_builder import PromptBuilder
+from config.config_manager import config_manager
+from config.settings import Settings
+from .loader import get_character_registry
+from .prompt_builder import CompiledPrompt, PromptBuilder
 from .memory_manager import MemoryManager
 
 
 class Character:
     def __init__(self, character_id: str):
-        self.loader = CharacterLoader()
-        self.loader.load_all_characters()
-        self.character_data = self.loader.get_character(character_id)
+        self.registry = get_character_registry()
+        self.character_data = self.registry.get_character(character_id)
         if not self.character_data:
             raise ValueError(f"Character {character_id} not found")
 
-        self.prompt_builder = PromptBuilder()
-        self.memory_manager = MemoryManager(self.character_data)
+        settings = config_manager.settings
+        self.prompt_builder = PromptBuilder(settings.prompt_cache_dir)
+        self.memory_manager = MemoryManager(
+            self.character_data,
+            top_k=settings.memory_top_k,
+            recent_messages=settings.memory_recent_messages,
+            max_entries=settings.memory_max_entries,
+            hint_token_budget=settings.hint_token_budget,
+            suppress_turns=settings.hint_suppress_turns
+        )
+
+    def apply_settings(self, settings: Settings) -> None:
+        """把新的配置快照应用到记忆检索"""
+        self.memory_manager.configure(
+            top_k=settings.memory_top_k,
+            recent_messages=settings.memory_recent_messages,
+            max_entries=settings.memory_max_entries,
+            hint_token_budget=settings.hint_token_budget,
+            suppress_turns=settings.hint_suppress_turns
+        )
+
+    def get_compiled_prompt(self) -> CompiledPrompt:
+        # 启用检索时记忆按需注入，不再全部放进系统提示
+        include_memories = self.memory_manager.top_k <= 0
+        return self.prompt_builder.compile(self.character_data, include_memories=include_memories)
 
     def get_system_prompt(self) -> str:
-        return self.prompt_builder.build_prompt(self.character_data)
+        return self.get_compiled_prompt().text
 
     def get_context_hints(self, context: str) -> Optional[str]:
         return self.memory_manager.get_context_hints(context)
 
+    def remember(self, role: str, content: str) -> None:
+        self.memory_manager.remember(role, content)
+
     def get_common_phrases(self) -> List[str]:
         return self.memory_manager.get_common_phrases()
\ No newline at end of file
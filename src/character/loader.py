@@ -5,32 +5,123 @@
 # └── memory_manager.py # 记忆管理器
 
 # src/character/loader.py
+import threading
 from pathlib import Path
 import yaml
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from config.config_manager import config_manager
 
 
+class CharacterRegistry:
+    """进程内共享的角色注册表
+
+    每个角色文件只在首次使用或文件修改（mtime 变化）后解析一次；
+    列出角色时只读取文件开头的 name 字段，不解析整个文件。
+    """
+
+    def __init__(self, characters_dir: Path):
+        self.characters_dir = characters_dir
+        self._characters: Dict[str, Tuple[int, dict]] = {}
+        self._names: Dict[str, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get_path(self, character_id: str) -> Path:
+        return self.characters_dir / f"{character_id}.yaml"
+
+    def list_characters(self) -> Dict[str, str]:
+        """返回 {角色ID: 角色名}，按角色ID排序"""
+        characters = {}
+        for file_path in sorted(self.characters_dir.glob('*.yaml')):
+            character_id = file_path.stem
+            mtime = self._get_mtime(file_path)
+            with self._lock:
+                cached = self._names.get(character_id)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, self._read_name(file_path) or character_id)
+                with self._lock:
+                    self._names[character_id] = cached
+            characters[character_id] = cached[1]
+        return characters
+
+    def get_character(self, character_id: str) -> Optional[dict]:
+        """按需加载角色配置，文件未修改时直接返回缓存"""
+        file_path = self.get_path(character_id)
+        mtime = self._get_mtime(file_path)
+        if mtime is None:
+            return None
+
+        with self._lock:
+            cached = self._characters.get(character_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        character = self._load_character(file_path)
+        with self._lock:
+            self._characters[character_id] = (mtime, character)
+        return character
+
+    def invalidate(self, character_id: Optional[str] = None) -> None:
+        """丢弃缓存，character_id 为空时清空全部"""
+        with self._lock:
+            if character_id is None:
+                self._characters.clear()
+                self._names.clear()
+            else:
+                self._characters.pop(character_id, None)
+                self._names.pop(character_id, None)
+
+    @staticmethod
+    def _get_mtime(file_path: Path) -> Optional[int]:
+        try:
+            return file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _load_character(file_path: Path) -> dict:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f)
+
+    @staticmethod
+    def _read_name(file_path: Path) -> Optional[str]:
+        """只读取顶层的 name 字段"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('name:'):
+                    value = yaml.safe_load(line)
+                    return str(value['name']) if value and value.get('name') else None
+        return None
+
+
+_registries: Dict[Path, CharacterRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_character_registry(characters_dir: Optional[Path] = None) -> CharacterRegistry:
+    """获取指定目录（默认为配置的角色目录）的共享注册表"""
+    characters_dir = Path(characters_dir or config_manager.get_character_dir())
+    with _registries_lock:
+        registry = _registries.get(characters_dir)
+        if registry is None:
+            registry = _registries[characters_dir] = CharacterRegistry(characters_dir)
+        return registry
+
+
 class CharacterLoader:
     """角色配置加载器"""
 
     def __init__(self, characters_dir: Optional[Path] = None):
-        self.characters_dir = characters_dir or config_manager.get_character_dir()
+        self.registry = get_character_registry(characters_dir)
+        self.characters_dir = self.registry.characters_dir
         self.characters: Dict[str, dict] = {}
-        self.load_all_characters()
 
     def load_all_characters(self) -> None:
-        for filename in self.characters_dir.glob('*.yaml'):
-            character_id = filename.stem
-            self.characters[character_id] = self._load_character(filename)
-
-    def _load_character(self, file_path: Path) -> dict:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        for character_id in self.registry.list_characters():
+            self.characters[character_id] = self.registry.get_character(character_id)
 
     def get_character(self, character_id: str) -> Optional[dict]:
-        return self.characters.get(character_id)
+        return self.registry.get_character(character_id)
 
 
 if __name__ == '__main__':
-    print(config_manager)
\ No newline at end of file
+    print(config_manager)
@@ -1,35 +1,131 @@
 # src/character/memory_manager.py
-from typing import List, Dict, Optional
+from collections import deque
+from typing import List, Dict, Optional, Set
+
+from models.tokens import estimate_tokens
+from utils import get_logger
+from .keyword_matcher import KeywordMatcher
+from .retriever import MemoryIndex, flatten_memories
+
+logger = get_logger("memory_manager")
+
+ROLE_NAMES = {"user": "用户", "assistant": "我"}
+
+# 角色配置中没有 keywords 时使用的默认关键词
+DEFAULT_KEYWORDS = {
+    '想你': ['family_events', 'daily_life'],
+    '吃': ['special_dishes'],
+    '孩子': ['family_events'],
+    '累': ['daily_life'],
+    '家': ['family_events', 'daily_life']
+}
 
 
 class MemoryManager:
-    """记忆管理器"""
+    """记忆管理器
 
-    def __init__(self, character: Dict):
+    每轮的上下文提示由两部分组成：与用户输入最相关的 top_k 条检索结果
+    （包括过往对话），以及角色配置 keywords 中命中关键词对应的记忆类别。
+    提示会去重、按 token 预算截断，最近几轮已经注入过的提示不再重复注入。
+    索引中的对话消息最多保留 max_entries 条，避免长会话中每轮检索越来越慢。
+    """
+
+    def __init__(self, character: Dict, top_k: int = 0, recent_messages: int = 8,
+                 max_entries: int = 1000, hint_token_budget: int = 200, suppress_turns: int = 3):
         self.character = character
-        self.keywords_map = {
-            '想你': ['family_events', 'daily_life'],
-            '吃': ['special_dishes'],
-            '孩子': ['family_events'],
-            '累': ['daily_life'],
-            '家': ['family_events', 'daily_life']
-        }
+        self.keywords_map = character.get('keywords') or DEFAULT_KEYWORDS
+        self.keyword_matcher = KeywordMatcher(self.keywords_map)
+        self.top_k = top_k
+        self.max_entries = max_entries
+        self.hint_token_budget = hint_token_budget
+        self.index = MemoryIndex()
+        # 最近的消息仍在上下文窗口中，检索时跳过
+        self._recent_ids = deque(maxlen=recent_messages)
+        # 最近几轮注入过的提示
+        self._recent_hints = deque(maxlen=suppress_turns)
+        if top_k > 0:
+            for text in flatten_memories(character.get('memories')):
+                self.index.add(text)
+        # 角色自身的记忆排在索引最前面，不会被淘汰
+        self._base_entries = len(self.index)
+
+    def configure(self, top_k: int, recent_messages: int, max_entries: int,
+                  hint_token_budget: int, suppress_turns: int) -> None:
+        """应用新的检索参数
+
+        是否启用检索决定了系统提示里带不带全部记忆，开关检索要等下次加载角色时生效，
+        这里只调整条数。
+        """
+        if (top_k > 0) == (self.top_k > 0):
+            self.top_k = top_k
+        elif top_k != self.top_k:
+            logger.info("MEMORY_TOP_K toggles retrieval; the change applies when the character is next loaded")
+        self.max_entries = max_entries
+        self.hint_token_budget = hint_token_budget
+        if recent_messages != self._recent_ids.maxlen:
+            self._recent_ids = deque(self._recent_ids, maxlen=recent_messages)
+        if suppress_turns != self._recent_hints.maxlen:
+            self._recent_hints = deque(self._recent_hints, maxlen=suppress_turns)
 
     def get_context_hints(self, context: str) -> Optional[str]:
-        hints = []
+        suppressed = set().union(*self._recent_hints)
+        candidates: Dict[str, None] = {}
+        for hint in self._get_retrieved_hints(context, suppressed):
+            candidates.setdefault(hint)
+        for keyword in self.keyword_matcher.find_all(context):
+            for memory_type in self.keywords_map[keyword]:
+                for memory in self._get_memories_by_type(memory_type):
+                    candidates.setdefault(memory)
 
-        for keyword, memory_types in self.keywords_map.items():
-            if keyword in context:
-                for memory_type in memory_types:
-                    memories = self._get_memories_by_type(memory_type)
-                    hints.extend(memories)
+        hints = []
+        budget = self.hint_token_budget
+        for hint in candidates:
+            if hint in suppressed:
+                continue
+            cost = estimate_tokens(hint)
+            if cost > budget:
+                break
+            budget -= cost
+            hints.append(hint)
 
+        self._recent_hints.append(set(hints))
         return "\n".join(hints) if hints else None
 
+    def _get_retrieved_hints(self, context: str, suppressed: Set[str]) -> List[str]:
+        if self.top_k <= 0:
+            return []
+        recent = set(self._recent_ids)
+        results = self.index.search(context, self.top_k + len(recent) + len(suppressed))
+        hints = [self.index.texts[i] for i, _ in results if i not in recent]
+        return [hint for hint in hints if hint not in suppressed][:self.top_k]
+
+    def remember(self, role: str, content: str) -> None:
+        """把一条对话消息加入检索索引"""
+        if self.top_k <= 0 or not content:
+            return
+        text = f"{ROLE_NAMES.get(role, role)}曾说：{content}"
+        self._recent_ids.append(self.index.add(text))
+        if len(self.index) - self._base_entries > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        """淘汰最早的对话消息
+
+        一次淘汰到上限的四分之三，压缩索引的开销分摊到多轮对话上。
+        """
+        keep = self.max_entries * 3 // 4
+        count = len(self.index) - self._base_entries - keep
+        start = self._base_entries
+        self.index.remove(start, start + count)
+        self._recent_ids = deque(
+            (i - count for i in self._recent_ids if i >= start + count),
+            maxlen=self._recent_ids.maxlen
+        )
+
     def _get_memories_by_type(self, memory_type: str) -> List[str]:
         memories = self.character.get('memories', {})
         return memories.get(memory_type, [])
 
     def get_common_phrases(self) -> List[str]:
         speaking_style = self.character.get('speaking_style', {})
-        return speaking_style.get('common_phrases', [])
\ No newline at end of file
+        return speaking_style.get('common_phrases', [])
@@ -1,13 +1,93 @@
 # src/character/prompt_builder.py
-from typing import List, Dict
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Dict, Optional
 import yaml
 
+from models.tokens import estimate_tokens
+from utils import get_logger
+
+logger = get_logger("prompt_builder")
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """编译好的系统提示"""
+    text: str
+    token_count: int
+    content_hash: str
+
 
 class PromptBuilder:
     """系统提示构建器"""
 
+    # 按角色内容哈希缓存编译结果，进程内共享
+    _cache: Dict[str, CompiledPrompt] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+    @staticmethod
+    def content_hash(character: Dict, include_memories: bool = True) -> str:
+        """角色配置内容的哈希"""
+        payload = json.dumps(
+            [character, include_memories], sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def compile(self, character: Dict, include_memories: bool = True) -> CompiledPrompt:
+        """获取编译好的系统提示，内容未变时直接命中缓存"""
+        content_hash = self.content_hash(character, include_memories)
+        with self._cache_lock:
+            compiled = self._cache.get(content_hash)
+        if compiled is not None:
+            return compiled
+
+        compiled = self._load_from_disk(content_hash)
+        if compiled is None:
+            text = self.build_prompt(character, include_memories=include_memories)
+            compiled = CompiledPrompt(text, estimate_tokens(text), content_hash)
+            self._save_to_disk(compiled)
+
+        with self._cache_lock:
+            self._cache[content_hash] = compiled
+        return compiled
+
+    def _get_cache_path(self, content_hash: str) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        return self.cache_dir / f"{content_hash}.json"
+
+    def _load_from_disk(self, content_hash: str) -> Optional[CompiledPrompt]:
+        path = self._get_cache_path(content_hash)
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return CompiledPrompt(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring broken prompt cache {path}: {e}")
+            return None
+
+    def _save_to_disk(self, compiled: CompiledPrompt) -> None:
+        path = self._get_cache_path(compiled.content_hash)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(compiled), f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Failed to write prompt cache {path}: {e}")
+
     @staticmethod
-    def build_prompt(character: Dict) -> str:
+    def build_prompt(character: Dict, include_memories: bool = True) -> str:
         prompt_parts = []
 
         # 添加基础提示
@@ -23,7 +103,8 @@ class PromptBuilder:
         prompt_parts.extend(PromptBuilder._build_speaking_style(character))
 
         # 添加记忆信息
-        prompt_parts.extend(PromptBuilder._build_memories(character))
+        if include_memories:
+            prompt_parts.extend(PromptBuilder._build_memories(character))
 
         return "\n".join(prompt_parts)
 
@@ -0,0 +1,111 @@
+# src/character/retriever.py
+import re
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+# 英文单词和数字作为整体切分，其余字符按字切分
+TOKEN_PATTERN = re.compile(r"[a-zA-Z]+|\d+|[^\sa-zA-Z\d]")
+PUNCTUATION = set("，。！？；：、“”‘’（）《》【】…—,.!?;:'\"()[]<>-~·")
+
+
+class MemoryIndex:
+    """本地记忆检索索引
+
+    不依赖网络和模型：文本切分成字/词的 1~2 元组，哈希到固定维度，
+    按 TF-IDF 加权后用余弦相似度取 top-k。
+    """
+
+    def __init__(self, dim: int = 2048, ngram_range: Tuple[int, int] = (1, 2)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.texts: List[str] = []
+        self._tf = np.zeros((16, dim), dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._weighted = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, text: str) -> int:
+        """加入一条文本，返回其编号"""
+        index = len(self.texts)
+        if index == len(self._tf):
+            self._tf = np.concatenate([self._tf, np.zeros_like(self._tf)])
+
+        vector = self._vectorize(text)
+        self._tf[index] = vector
+        self._df += vector > 0
+        self.texts.append(text)
+        self._weighted = None
+        return index
+
+    def remove(self, start: int, stop: int) -> None:
+        """删除编号在 [start, stop) 之间的文本，后面的编号依次前移"""
+        count = len(self.texts)
+        stop = min(stop, count)
+        if start >= stop:
+            return
+        self._df -= np.count_nonzero(self._tf[start:stop], axis=0)
+        remaining = count - (stop - start)
+        self._tf[start:remaining] = self._tf[stop:count]
+        self._tf[remaining:count] = 0
+        del self.texts[start:stop]
+        self._weighted = None
+
+    def search(self, query: str, k: int, min_score: float = 0.08) -> List[Tuple[int, float]]:
+        """返回与 query 最相关的 k 条文本的 (编号, 相似度)"""
+        if not self.texts or k <= 0:
+            return []
+
+        idf = self._idf()
+        if self._weighted is None:
+            weighted = self._tf[:len(self.texts)] * idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._weighted = weighted / np.maximum(norms, 1e-12)
+
+        query_vector = self._vectorize(query) * idf
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return []
+        scores = self._weighted @ (query_vector / norm)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def _idf(self) -> np.ndarray:
+        n = len(self.texts)
+        return (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        tokens = [token.lower() for token in TOKEN_PATTERN.findall(text) if token not in PUNCTUATION]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = "\x1f".join(tokens[i:i + n])
+                vector[zlib.crc32(gram.encode('utf-8')) % self.dim] += 1
+        # 次线性词频，避免长文本中的重复字占主导
+        nonzero = vector > 0
+        vector[nonzero] = 1 + np.log(vector[nonzero])
+        return vector
+
+
+def flatten_memories(memories) -> List[str]:
+    """把角色配置中的 memories 展开成逐条文本"""
+    if not memories:
+        return []
+    if isinstance(memories, dict):
+        items = []
+        for entries in memories.values():
+            if isinstance(entries, list):
+                items.extend(str(entry) for entry in entries)
+            else:
+                items.append(str(entries))
+        return items
+    if isinstance(memories, list):
+        return [str(entry) for entry in memories]
+    return [str(memories)]
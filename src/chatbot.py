@@ -1,17 +1,34 @@
 # src/chatbot/chatbot.py
-from typing import Optional
+import time
+from typing import AsyncIterator, List, Dict, Optional
 
 from character.character import Character
 from config.config_manager import config_manager
-from models.conversation import Conversation
+from models.chat_store import ChatLogStore, get_chat_store, new_session_id
+from models.conversation import Conversation, TokenBudgetPolicy
+from services.base_ai import AbstractChatBot
 from services.chat_service import get_selected_bot
+from services.summarizer import ConversationCompactor
+from services.tracing import get_tracer
 
 
 class ChatBot:
     """聊天机器人主类"""
 
-    def __init__(self, character_id: str = "li_ming"):
-        self.chatbot = get_selected_bot()
+    def __init__(self, character_id: str = "li_ming", store: Optional[ChatLogStore] = None,
+                 bot: Optional[AbstractChatBot] = None):
+        # 多个会话可以共享同一个后端客户端
+        self.chatbot = bot or get_selected_bot()
+        self.store = store or get_chat_store()
+        self.tracer = get_tracer()
+        # 当前生效的配置快照，配置重新加载后在下一轮开始时更新
+        self.settings = config_manager.settings
+        self.compactor = ConversationCompactor(
+            self.chatbot,
+            threshold_tokens=self.settings.summary_threshold_tokens,
+            block_turns=self.settings.summary_block_turns,
+            on_compacted=self._log_summary
+        )
         self.conversation = Conversation()
         self.load_character(character_id)
 
@@ -22,46 +39,162 @@ class ChatBot:
         self._initialize_conversation()
 
     def _initialize_conversation(self) -> None:
-        """初始化对话"""
-        self.conversation = Conversation()
-        system_prompt = self.character.get_system_prompt()
-        self.conversation.add_message("system", system_prompt)
+        """初始化对话，并开始一个新的会话记录"""
+        self.compactor.cancel()
+        self.session_id = new_session_id()
+        self.conversation = Conversation(context_policy=self._create_context_policy())
+        system_prompt = self.character.get_compiled_prompt()
+        self.conversation.add_message(
+            "system", system_prompt.text, pinned=True, content_tokens=system_prompt.token_count
+        )
+
+    def resume_session(self, session_id: Optional[str] = None) -> bool:
+        """从本地聊天记录恢复会话，默认恢复当前角色最近的会话
+
+        Returns:
+            是否恢复了历史消息
+        """
+        session_id = session_id or self.store.get_latest_session(self.current_character_id)
+        if not session_id:
+            return False
+
+        self._refresh_settings()
+        summary, records = self.store.read_tail(
+            self.current_character_id, session_id, self.settings.resume_max_messages
+        )
+        if not summary and not records:
+            return False
+
+        self._initialize_conversation()
+        self.session_id = session_id
+        if summary:
+            self.conversation.set_summary(summary)
+        for record in records:
+            self.conversation.add_message(record["role"], record["content"])
+            self.character.remember(record["role"], record["content"])
+        return True
+
+    def _log_message(self, role: str, content: str) -> None:
+        """追加一条消息到本地聊天记录"""
+        self.store.append(self.current_character_id, self.session_id, {
+            "role": role,
+            "content": content
+        })
+
+    def _log_summary(self, conversation: Conversation) -> None:
+        """记录压缩后的摘要，以及摘要之后仍保留的消息数"""
+        if conversation is not self.conversation:
+            return
+        self.store.append(self.current_character_id, self.session_id, {
+            "type": "summary",
+            "content": conversation.summary,
+            "remaining": len(conversation.messages) - conversation.pinned_count
+        })
+
+    def _create_context_policy(self) -> TokenBudgetPolicy:
+        """根据配置创建上下文窗口策略"""
+        return TokenBudgetPolicy(
+            max_tokens=self.settings.context_token_budget,
+            evict=self.settings.context_evict
+        )
+
+    def _refresh_settings(self) -> None:
+        """配置快照被替换时，把新的参数应用到当前会话"""
+        settings = config_manager.settings
+        if settings is not self.settings:
+            self.settings = settings
+            self.conversation.context_policy = self._create_context_policy()
+            self.compactor.threshold_tokens = settings.summary_threshold_tokens
+            self.compactor.block_turns = settings.summary_block_turns
+            self.character.apply_settings(settings)
+
+    def _prepare_messages(self, user_input: str) -> List[Dict[str, str]]:
+        """记录用户输入并生成本轮请求的消息列表"""
+        self._refresh_settings()
+
+        # 获取上下文提示
+        with self.tracer.span("context_hints"):
+            context_hint = self.character.get_context_hints(user_input)
+        if context_hint:
+            self.conversation.add_context_hint(context_hint)
+
+        # 添加用户输入
+        self.conversation.add_message("user", user_input)
+        self._log_message("user", user_input)
+        self.character.remember("user", user_input)
+
+        # 获取完整的对话历史
+        return self.conversation.get_messages_with_context()
+
+    def _finish_turn(self, response: str) -> None:
+        """保存 AI 响应并清理本轮状态"""
+        self.conversation.add_message("assistant", response)
+        self._log_message("assistant", response)
+        self.character.remember("assistant", response)
+        self.conversation.clear_context_hints()
+        # 历史过长时在后台压缩，不阻塞本轮
+        self.compactor.maybe_compact(self.conversation)
 
     async def chat(self, user_input: str) -> Optional[str]:
         """处理用户输入并返回响应"""
         try:
-            # 获取上下文提示
-            context_hint = self.character.get_context_hints(user_input)
-            if context_hint:
-                self.conversation.add_context_hint(context_hint)
+            messages = self._prepare_messages(user_input)
 
-            # 添加用户输入
-            self.conversation.add_message("user", user_input)
+            # 发送请求获取响应
+            with self.tracer.span("llm_total"):
+                response = await self.chatbot.send_message(
+                    messages=messages,
+                    max_tokens=self.settings.max_tokens,
+                    session_id=self.session_id
+                )
+
+            self._finish_turn(response)
+            return response
 
-            # 获取完整的对话历史
-            messages = self.conversation.get_messages_with_context()
+        except Exception as e:
+            raise ChatBotError(f"Chat error: {str(e)}")
 
-            # 获取配置参数
-            max_tokens = int(config_manager.get_config_value('MAX_TOKENS', '40000'))
+    async def chat_stream(self, user_input: str, auto_commit: bool = True) -> AsyncIterator[str]:
+        """处理用户输入并以流式方式返回响应片段
 
-            # 发送请求获取响应
-            response = await self.chatbot.send_message(
+        完整的响应在流结束后写入对话历史；auto_commit 为 False 时由调用方
+        通过 commit_reply 决定写入的内容。
+        """
+        try:
+            messages = self._prepare_messages(user_input)
+
+            parts = []
+            started = time.perf_counter()
+            stream = self.chatbot.stream_message(
                 messages=messages,
-                temperature=self.chatbot.get_temperature(),
-                max_tokens=max_tokens
+                max_tokens=self.settings.max_tokens,
+                session_id=self.session_id
             )
-
-            # 保存 AI 响应
-            self.conversation.add_message("assistant", response)
-
-            # 清理上下文提示
-            self.conversation.clear_context_hints()
-
-            return response
+            try:
+                async for delta in stream:
+                    if not parts:
+                        self.tracer.record("llm_ttft", time.perf_counter() - started)
+                    parts.append(delta)
+                    yield delta
+            finally:
+                # 调用方提前停止时立即释放后端名额和连接
+                await stream.aclose()
+            self.tracer.record("llm_total", time.perf_counter() - started)
+
+            if auto_commit:
+                self._finish_turn("".join(parts))
 
         except Exception as e:
             raise ChatBotError(f"Chat error: {str(e)}")
 
+    def commit_reply(self, reply: str) -> None:
+        """记录本轮最终给出的回复，例如被用户打断时只记录已经说出口的部分"""
+        reply = reply.strip()
+        if reply:
+            self._finish_turn(reply)
+        else:
+            self.conversation.clear_context_hints()
+
     def clear_history(self) -> None:
         """清除对话历史"""
         self._initialize_conversation()
@@ -1,8 +1,14 @@
 # src/config/config_manager.py
 import os
+import threading
 from pathlib import Path
-from typing import Optional
-from dotenv import load_dotenv
+from typing import Dict, Optional, Tuple
+from dotenv import dotenv_values
+
+from config.settings import Settings
+from utils import get_logger
+
+logger = get_logger("config_manager")
 
 
 class ConfigManager:
@@ -20,6 +26,9 @@ class ConfigManager:
 
         self._initialized = True
         self.config_dir = self._get_config_dir()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
         self._load_env()
 
     @staticmethod
@@ -37,7 +46,6 @@ class ConfigManager:
                 fp.write('''
 API_KEY=xxx
 MODEL_NAME=charglm-4
-TEMPERATURE=0.7
 MAX_TOKENS=2000
 
 # Paths
@@ -45,7 +53,88 @@ CHARACTERS_DIR=characters
 ''')
             raise FileNotFoundError(f"please enter API_KEY at {env_path}")
 
-        load_dotenv(env_path)
+        self.env_path = env_path
+        # 启动时已存在的环境变量优先于 .env，重新加载时也不覆盖
+        self._process_keys = frozenset(os.environ)
+        self._env_keys = set()
+        self._env_mtime = self._get_env_mtime()
+        self.settings = self._apply_env(self._read_env())
+
+    def _read_env(self) -> Dict[str, str]:
+        """读取 .env 中未被进程环境变量覆盖的配置项"""
+        return {
+            key: value for key, value in dotenv_values(self.env_path).items()
+            if value is not None and key not in self._process_keys
+        }
+
+    def _apply_env(self, values: Dict[str, str]) -> Settings:
+        """校验新的配置，通过后写入环境变量并返回新的快照"""
+        environ = dict(os.environ)
+        removed = self._env_keys - values.keys()
+        for key in removed:
+            environ.pop(key, None)
+        environ.update(values)
+        settings = Settings.from_env(environ)
+
+        for key in removed:
+            os.environ.pop(key, None)
+        os.environ.update(values)
+        self._env_keys = set(values)
+        return settings
+
+    def _get_env_mtime(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.env_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """重新读取 .env，校验通过后整体替换配置快照
+
+        Returns:
+            是否加载了新的配置；配置有误时保留原来的快照
+        """
+        with self._reload_lock:
+            try:
+                settings = self._apply_env(self._read_env())
+            except ValueError as e:
+                logger.error(f"Invalid config in {self.env_path}, keeping previous settings: {e}")
+                return False
+            if settings != self.settings:
+                logger.info(f"Config reloaded: {settings}")
+            # 只替换引用，读取方不会看到更新到一半的配置
+            self.settings = settings
+            return True
+
+    def start_watching(self, interval: Optional[float] = None) -> None:
+        """在后台线程中按修改时间检查 .env，变化后自动重新加载
+
+        CONFIG_RELOAD=false 时不启动；interval 默认读取 CONFIG_RELOAD_INTERVAL（秒）。
+        """
+        if self._watcher is not None or self.get_config_value('CONFIG_RELOAD', 'true').lower() != 'true':
+            return
+        if interval is None:
+            interval = float(self.get_config_value('CONFIG_RELOAD_INTERVAL', '1'))
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="config-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is None:
+            return
+        self._watch_stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._watch_stop.wait(interval):
+            mtime = self._get_env_mtime()
+            if mtime is not None and mtime != self._env_mtime:
+                self._env_mtime = mtime
+                self.reload()
 
     def get_api_key(self) -> str:
         """获取 API key"""
@@ -56,7 +145,7 @@ CHARACTERS_DIR=characters
 
     def get_model_name(self) -> str:
         """获取模型名称"""
-        return os.getenv('MODEL_NAME', 'charglm-4')
+        return self.settings.model_name
 
     def get_character_dir(self) -> Path:
         """获取角色配置目录"""
@@ -0,0 +1,119 @@
+# src/config/settings.py
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+# 各后端温度的配置项，键为后端名
+BACKEND_TEMPERATURE_KEYS = {
+    'chatglm': 'CHATGLM_TEMPERATURE',
+    'deepseek': 'DEEPSEEK_TEMPERATURE',
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """每轮对话都会读取的调优参数
+
+    由 .env 和环境变量解析、校验后生成的不可变快照。配置文件变化时整体替换为
+    新的快照，读取方拿到的始终是一份完整一致的配置，下一轮对话即按新值生效。
+    """
+    model_name: str = 'charglm-4'
+    # 按后端名配置的温度，未配置的后端使用自己的默认温度
+    temperatures: Mapping[str, float] = field(default_factory=dict, hash=False)
+    max_tokens: int = 40000
+    context_token_budget: int = 4000
+    context_evict: bool = False
+    summary_threshold_tokens: int = 3000
+    summary_block_turns: int = 4
+    hint_token_budget: int = 200
+    # 每轮检索的记忆条数，为 0 时不检索，改为把全部记忆写进系统提示
+    memory_top_k: int = 3
+    # 最近几条消息仍在上下文窗口中，检索时跳过
+    memory_recent_messages: int = 8
+    # 检索索引中最多保留的对话消息条数，超出后淘汰最早的
+    memory_max_entries: int = 1000
+    hint_suppress_turns: int = 3
+    resume_max_messages: int = 50
+    prompt_cache_dir: Optional[str] = None
+    # 播放回复时继续识别，用户开口即打断。没有回声消除，外放时机器人自己的声音
+    # 也会被识别成用户说话，只适合戴耳机使用
+    barge_in: bool = False
+    barge_in_min_chars: int = 2
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "Settings":
+        """从环境变量解析配置
+
+        Raises:
+            ValueError: 配置项无法解析或超出取值范围时
+        """
+        return cls(
+            model_name=env.get('MODEL_NAME') or cls.model_name,
+            temperatures=_get_temperatures(env),
+            max_tokens=_get_int(env, 'MAX_TOKENS', cls.max_tokens, minimum=1),
+            context_token_budget=_get_int(env, 'CONTEXT_TOKEN_BUDGET', cls.context_token_budget, minimum=1),
+            context_evict=_get_bool(env, 'CONTEXT_EVICT', cls.context_evict),
+            summary_threshold_tokens=_get_int(env, 'SUMMARY_THRESHOLD_TOKENS', cls.summary_threshold_tokens),
+            summary_block_turns=_get_int(env, 'SUMMARY_BLOCK_TURNS', cls.summary_block_turns, minimum=1),
+            hint_token_budget=_get_int(env, 'HINT_TOKEN_BUDGET', cls.hint_token_budget, minimum=0),
+            memory_top_k=_get_int(env, 'MEMORY_TOP_K', cls.memory_top_k, minimum=0, maximum=50),
+            memory_recent_messages=_get_int(env, 'MEMORY_RECENT_MESSAGES', cls.memory_recent_messages, minimum=0),
+            memory_max_entries=_get_int(env, 'MEMORY_MAX_ENTRIES', cls.memory_max_entries, minimum=1),
+            hint_suppress_turns=_get_int(env, 'HINT_SUPPRESS_TURNS', cls.hint_suppress_turns, minimum=0),
+            resume_max_messages=_get_int(env, 'RESUME_MAX_MESSAGES', cls.resume_max_messages, minimum=1),
+            prompt_cache_dir=env.get('PROMPT_CACHE_DIR') or None,
+            barge_in=_get_bool(env, 'BARGE_IN', cls.barge_in),
+            barge_in_min_chars=_get_int(env, 'BARGE_IN_MIN_CHARS', cls.barge_in_min_chars, minimum=1),
+        )
+
+
+def _check_range(key: str, value, minimum, maximum) -> None:
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{key} must be >= {minimum}, got {value}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{key} must be <= {maximum}, got {value}")
+
+
+def _get_int(env: Mapping[str, str], key: str, default: int, minimum: Optional[int] = None,
+             maximum: Optional[int] = None) -> int:
+    raw = env.get(key, '').strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{key} must be an integer, got {raw!r}")
+    _check_range(key, value, minimum, maximum)
+    return value
+
+
+def _get_float(env: Mapping[str, str], key: str, default: Optional[float], minimum: Optional[float] = None,
+               maximum: Optional[float] = None) -> Optional[float]:
+    raw = env.get(key, '').strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{key} must be a number, got {raw!r}")
+    _check_range(key, value, minimum, maximum)
+    return value
+
+
+def _get_temperatures(env: Mapping[str, str]) -> Dict[str, float]:
+    temperatures = {}
+    for backend, key in BACKEND_TEMPERATURE_KEYS.items():
+        value = _get_float(env, key, None, minimum=0.0, maximum=2.0)
+        if value is not None:
+            temperatures[backend] = value
+    return temperatures
+
+
+def _get_bool(env: Mapping[str, str], key: str, default: bool) -> bool:
+    raw = env.get(key, '').strip().lower()
+    if not raw:
+        return default
+    if raw in ('true', '1', 'yes', 'on'):
+        return True
+    if raw in ('false', '0', 'no', 'off'):
+        return False
+    raise ValueError(f"{key} must be true or false, got {raw!r}")
@@ -0,0 +1,200 @@
+# src/models/chat_store.py
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from config.config_manager import config_manager
+from utils import get_logger
+
+logger = get_logger("chat_store")
+
+# 反向读取日志时每次读取的块大小
+READ_BLOCK_SIZE = 8192
+# 同时保持打开的日志文件数上限
+MAX_OPEN_FILES = 64
+# 通知写线程立即写入当前批次的标记
+_FLUSH = object()
+
+
+def new_session_id() -> str:
+    """生成按时间排序的会话 ID"""
+    return f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class ChatLogStore:
+    """本地聊天记录
+
+    每个角色的每个会话对应一个只追加的 JSONL 文件：
+    ``<root_dir>/<character_id>/<session_id>.jsonl``。
+    append 只把记录放进队列，由后台线程批量写入并 fsync，不会阻塞对话。
+    """
+
+    def __init__(self, root_dir: Path, flush_interval: float = 0.5, batch_size: int = 64):
+        self.root_dir = Path(root_dir)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue()
+        self._files: Dict[Path, IO[bytes]] = {}
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="chat-log-writer", daemon=True)
+        self._writer.start()
+
+    def get_session_path(self, character_id: str, session_id: str) -> Path:
+        return self.root_dir / character_id / f"{session_id}.jsonl"
+
+    def append(self, character_id: str, session_id: str, record: dict) -> None:
+        """追加一条记录（异步写入）"""
+        if self._closed:
+            return
+        record.setdefault("ts", time.time())
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._queue.put((self.get_session_path(character_id, session_id), line.encode('utf-8')))
+
+    def flush(self) -> None:
+        """等待已追加的记录全部落盘"""
+        if not self._closed:
+            self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self) -> None:
+        """写完剩余记录并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def list_sessions(self, character_id: str) -> List[str]:
+        """按时间顺序列出角色的所有会话"""
+        character_dir = self.root_dir / character_id
+        if not character_dir.exists():
+            return []
+        return sorted(path.stem for path in character_dir.glob('*.jsonl'))
+
+    def get_latest_session(self, character_id: str) -> Optional[str]:
+        sessions = self.list_sessions(character_id)
+        return sessions[-1] if sessions else None
+
+    def read_tail(self, character_id: str, session_id: str,
+                  max_messages: int) -> Tuple[Optional[str], List[dict]]:
+        """从日志末尾恢复会话
+
+        从文件末尾反向读取，只解析最近的记录：遇到最新的摘要后，
+        再取摘要生成时仍保留在对话中的消息即可停止。
+
+        Returns:
+            (摘要, 按时间顺序排列的最近消息记录)
+        """
+        self.flush()
+        path = self.get_session_path(character_id, session_id)
+        if not path.exists():
+            return None, []
+
+        summary = None
+        needed = max_messages
+        messages = []
+        for line in self._iter_lines_reversed(path):
+            if len(messages) >= needed:
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 进程异常退出时最后一行可能不完整
+                continue
+            if record.get("type") == "summary":
+                if summary is None:
+                    summary = record["content"]
+                    needed = min(max_messages, len(messages) + record.get("remaining", 0))
+                continue
+            messages.append(record)
+
+        messages.reverse()
+        return summary, messages
+
+    @staticmethod
+    def _iter_lines_reversed(path: Path) -> Iterator[bytes]:
+        """从文件末尾开始逐行反向读取"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0:
+                size = min(READ_BLOCK_SIZE, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + remainder).split(b"\n")
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line
+            if remainder:
+                yield remainder
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 在一个刷新周期内尽量攒一批记录，一次 fsync
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None and item is not _FLUSH and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            self._write_batch([entry for entry in batch if entry is not None and entry is not _FLUSH])
+            for _ in batch:
+                self._queue.task_done()
+            if batch[-1] is None:
+                for f in self._files.values():
+                    f.close()
+                self._files.clear()
+                return
+
+    def _write_batch(self, batch: List[Tuple[Path, bytes]]) -> None:
+        touched = set()
+        for path, line in batch:
+            try:
+                f = self._files.get(path)
+                if f is None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    f = self._files[path] = open(path, 'ab')
+                f.write(line)
+                touched.add(path)
+            except OSError as e:
+                logger.error(f"Failed to write chat log {path}: {e}")
+
+        for path in touched:
+            try:
+                f = self._files[path]
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError as e:
+                logger.error(f"Failed to sync chat log {path}: {e}")
+
+        if len(self._files) > MAX_OPEN_FILES:
+            for path in [path for path in self._files if path not in touched]:
+                self._files.pop(path).close()
+
+
+_chat_store: Optional[ChatLogStore] = None
+
+
+def get_chat_store() -> ChatLogStore:
+    """获取进程内共享的聊天记录存储"""
+    global _chat_store
+    if _chat_store is None:
+        root_dir = Path(config_manager.get_config_value('CHAT_LOG_DIR', 'data/chats'))
+        _chat_store = ChatLogStore(root_dir)
+        atexit.register(_chat_store.close)
+    return _chat_store
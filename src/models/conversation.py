@@ -1,20 +1,119 @@
 # src/models/conversation.py
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 
+from models.tokens import MESSAGE_OVERHEAD_TOKENS, estimate_message_tokens
+
+# 摘要消息的标题，摘要作为一条固定的系统消息放在系统提示之后
+SUMMARY_HEADER = "### 之前的对话摘要：\n"
+
+
+@dataclass
+class TokenBudgetPolicy:
+    """按 token 预算裁剪上下文窗口的策略
+
+    固定消息（系统提示）始终保留，其余消息从最新往最旧累加，
+    超出预算的最旧轮次被丢弃。evict 为 True 时直接从历史中移除，
+    否则只是不发送给模型。
+    """
+    max_tokens: int
+    evict: bool = False
+
+    def window_start(self, token_counts: List[int], pinned: int, reserved: int = 0) -> int:
+        """返回在预算内可以保留的第一条非固定消息的下标"""
+        budget = self.max_tokens - reserved - sum(token_counts[:pinned])
+        start = len(token_counts)
+        while start > pinned:
+            cost = token_counts[start - 1]
+            # 最新的一条消息无论如何都要发送
+            if budget < cost and start < len(token_counts):
+                break
+            budget -= cost
+            start -= 1
+        return start
+
 
 @dataclass
 class Conversation:
     """对话管理类"""
     messages: List[Dict[str, str]] = field(default_factory=list)
     context_hints: List[str] = field(default_factory=list)
+    context_policy: Optional[TokenBudgetPolicy] = None
+    token_counts: List[int] = field(default_factory=list)
+    pinned_count: int = 0
+    summary: Optional[str] = None
+
+    def add_message(self, role: str, content: str, pinned: bool = False,
+                    content_tokens: Optional[int] = None) -> None:
+        """添加新消息
 
-    def add_message(self, role: str, content: str) -> None:
-        """添加新消息"""
-        self.messages.append({
+        pinned 的消息（如系统提示）排在所有普通消息之前，不会被窗口裁剪。
+        content_tokens 为已知的内容 token 数，省略时自动估算。
+        """
+        message = {
             "role": role,
             "content": content
-        })
+        }
+        if content_tokens is None:
+            tokens = estimate_message_tokens(content)
+        else:
+            tokens = content_tokens + MESSAGE_OVERHEAD_TOKENS
+        if pinned:
+            self.messages.insert(self.pinned_count, message)
+            self.token_counts.insert(self.pinned_count, tokens)
+            self.pinned_count += 1
+            return
+
+        self.messages.append(message)
+        self.token_counts.append(tokens)
+        if self.context_policy and self.context_policy.evict:
+            self._evict(self._window_start())
+
+    def set_summary(self, summary: str) -> None:
+        """设置或替换对话摘要"""
+        message = {
+            "role": "system",
+            "content": SUMMARY_HEADER + summary
+        }
+        if self.summary is None:
+            self.add_message(message["role"], message["content"], pinned=True)
+        else:
+            # 摘要总是最后一条固定消息
+            index = self.pinned_count - 1
+            self.messages[index] = message
+            self.token_counts[index] = estimate_message_tokens(message["content"])
+        self.summary = summary
+
+    def get_oldest_turns(self, turns: int) -> List[Dict[str, str]]:
+        """获取最旧的若干轮完整对话，不包括最新一轮"""
+        last_user = max(
+            (i for i in range(self.pinned_count, len(self.messages)) if self.messages[i]["role"] == "user"),
+            default=self.pinned_count
+        )
+        end = self.pinned_count
+        seen = 0
+        while end < last_user:
+            if self.messages[end]["role"] == "user":
+                if seen == turns:
+                    break
+                seen += 1
+            end += 1
+        if seen < turns:
+            return []
+        return self.messages[self.pinned_count:end]
+
+    def compact(self, block: List[Dict[str, str]], summary: str) -> bool:
+        """用摘要替换最旧的一段对话
+
+        block 必须仍是历史中最旧的那段消息（同一批对象），
+        否则说明历史在摘要期间被清空或裁剪过，放弃替换。
+        """
+        current = self.messages[self.pinned_count:self.pinned_count + len(block)]
+        if not block or len(current) != len(block) or any(a is not b for a, b in zip(current, block)):
+            return False
+        self._evict(self.pinned_count + len(block))
+        self.set_summary(summary)
+        return True
 
     def add_context_hint(self, hint: str) -> None:
         """添加上下文提示"""
@@ -24,21 +123,47 @@ class Conversation:
         """清除上下文提示"""
         self.context_hints.clear()
 
+    def get_token_count(self) -> int:
+        """获取完整历史的 token 数"""
+        return sum(self.token_counts)
+
     def get_messages(self) -> List[Dict[str, str]]:
         """获取原始消息列表"""
         return self.messages.copy()
 
     def get_messages_with_context(self) -> List[Dict[str, str]]:
-        """获取包含上下文提示的消息列表"""
+        """获取包含上下文提示的消息列表（按策略裁剪到预算内）"""
+        hint = "\n".join(self.context_hints)
+        reserved = estimate_message_tokens(hint) if self.context_hints else 0
+        start = self._window_start(reserved)
+        messages = self.messages[:self.pinned_count] + self.messages[start:]
+
         if not self.context_hints:
-            return self.messages.copy()
+            return messages
 
-        messages = self.messages.copy()
         insert_pos = len(messages) - 1 if messages else 0
 
         messages.insert(insert_pos, {
             "role": "system",
-            "content": "\n".join(self.context_hints)
+            "content": hint
         })
 
-        return messages
\ No newline at end of file
+        return messages
+
+    def _window_start(self, reserved: int = 0) -> int:
+        """计算窗口中第一条非固定消息的下标，保证从完整的一轮开始"""
+        if not self.context_policy:
+            return self.pinned_count
+
+        start = self.context_policy.window_start(self.token_counts, self.pinned_count, reserved)
+        # 不从半轮对话（助手回复）开始
+        while start < len(self.messages) - 1 and self.messages[start]["role"] != "user":
+            start += 1
+        return start
+
+    def _evict(self, start: int) -> None:
+        """从历史中移除窗口之前的非固定消息"""
+        if start <= self.pinned_count:
+            return
+        del self.messages[self.pinned_count:start]
+        del self.token_counts[self.pinned_count:start]
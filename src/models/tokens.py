@@ -0,0 +1,35 @@
+# src/models/tokens.py
+
+# 每条消息在对话模板中的额外开销（角色标记、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _is_cjk(ch: str) -> bool:
+    code = ord(ch)
+    return (
+        0x4E00 <= code <= 0x9FFF       # 中日韩统一表意文字
+        or 0x3400 <= code <= 0x4DBF    # 扩展 A
+        or 0x3000 <= code <= 0x303F    # 中文标点
+        or 0xFF00 <= code <= 0xFFEF    # 全角字符
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数
+
+    本地模型的分词器不可用时的近似：中文字符按每字 1 个 token 计，
+    其余字符按每 4 个字符 1 个 token 计。
+    """
+    cjk = 0
+    other = 0
+    for ch in text:
+        if _is_cjk(ch):
+            cjk += 1
+        else:
+            other += 1
+    return cjk + (other + 3) // 4
+
+
+def estimate_message_tokens(content: str) -> int:
+    """估算一条消息（含模板开销）的 token 数"""
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
@@ -0,0 +1,347 @@
+# src/server/chat_server.py
+import asyncio
+import functools
+import hashlib
+import hmac
+import json
+import re
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from aiohttp import web, WSMsgType
+
+from chatbot import ChatBot, ChatBotError
+from character.loader import get_character_registry
+from config.config_manager import config_manager
+from models.chat_store import ChatLogStore
+from services.base_ai import AbstractChatBot
+from services.chat_service import get_selected_bot
+from services.http_pool import close_http_clients
+from services.router import RouterChatBot
+from services.scheduler import get_scheduler_metrics
+from services.tracing import get_tracer
+from utils import get_logger
+
+logger = get_logger("chat_server")
+
+_dumps = functools.partial(json.dumps, ensure_ascii=False)
+
+# 角色ID和会话ID会拼进文件路径，只允许这些字符
+ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class SessionAccessError(Exception):
+    """会话令牌不匹配"""
+    pass
+
+
+class SessionConflictError(Exception):
+    """请求的角色与已有会话的角色不一致"""
+    pass
+
+
+@dataclass
+class ChatSession:
+    """服务端的一个聊天会话"""
+    chatbot: ChatBot
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_active: float = field(default_factory=time.monotonic)
+
+    @property
+    def session_id(self) -> str:
+        return self.chatbot.session_id
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+
+class SessionManager:
+    """管理多个并发会话
+
+    所有会话共享同一个后端客户端（及其连接池）和角色注册表；
+    同一会话内的轮次串行执行，不同会话之间互不阻塞。
+    """
+
+    def __init__(self, bot: AbstractChatBot, idle_timeout: float = 1800, max_sessions: int = 1000,
+                 secret: Optional[str] = None, store: Optional[ChatLogStore] = None):
+        self.bot = bot
+        # 未指定时使用默认的本地聊天记录
+        self.store = store
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, ChatSession] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        # 未配置密钥时每次启动随机生成，此时令牌只在本进程内有效
+        self._secret = secret.encode('utf-8') if secret else secrets.token_bytes(32)
+
+    def get_token(self, session_id: str) -> str:
+        """会话令牌：会话ID可以被猜到，访问和恢复会话还需要持有令牌"""
+        return hmac.new(self._secret, session_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def check_token(self, session_id: str, token: Optional[str]) -> bool:
+        return bool(token) and hmac.compare_digest(self.get_token(session_id), token)
+
+    async def create_session(self, character_id: str, session_id: Optional[str] = None,
+                             token: Optional[str] = None) -> ChatSession:
+        """创建会话，指定 session_id 和对应的令牌时从本地聊天记录恢复
+
+        Raises:
+            SessionAccessError: 令牌与 session_id 不匹配
+            SessionConflictError: 会话正在使用另一个角色
+        """
+        if session_id and not self.check_token(session_id, token):
+            raise SessionAccessError("invalid session token")
+
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None:
+            # 加载角色和读取聊天记录都是阻塞操作，不能占用事件循环
+            chatbot = await asyncio.to_thread(self._create_chatbot, character_id, session_id)
+            # 等待期间同一会话可能已被另一个请求恢复
+            session = self.sessions.get(chatbot.session_id)
+            if session is None:
+                if len(self.sessions) >= self.max_sessions:
+                    self._evict_oldest()
+                session = ChatSession(chatbot)
+                self.sessions[session.session_id] = session
+        if session.chatbot.current_character_id != character_id:
+            raise SessionConflictError(
+                f"session uses character {session.chatbot.current_character_id}, not {character_id}"
+            )
+        session.touch()
+        return session
+
+    def _create_chatbot(self, character_id: str, session_id: Optional[str]) -> ChatBot:
+        chatbot = ChatBot(character_id, store=self.store, bot=self.bot)
+        if session_id:
+            chatbot.resume_session(session_id)
+        return chatbot
+
+    def get_session(self, session_id: str) -> Optional[ChatSession]:
+        session = self.sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.chatbot.compactor.cancel()
+        return True
+
+    def evict_idle(self) -> int:
+        """关闭空闲超时且没有进行中轮次的会话"""
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [
+            session_id for session_id, session in self.sessions.items()
+            if session.last_active < deadline and not session.lock.locked()
+        ]
+        for session_id in idle:
+            self.close_session(session_id)
+        return len(idle)
+
+    def _evict_oldest(self) -> None:
+        idle = [session for session in self.sessions.values() if not session.lock.locked()]
+        if idle:
+            oldest = min(idle, key=lambda session: session.last_active)
+            self.close_session(oldest.session_id)
+
+    def start(self) -> None:
+        self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop(self) -> None:
+        if self._reaper:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+
+    async def _reap_loop(self) -> None:
+        interval = max(1.0, min(60.0, self.idle_timeout / 4))
+        while True:
+            await asyncio.sleep(interval)
+            evicted = self.evict_idle()
+            if evicted:
+                logger.info(f"Evicted {evicted} idle sessions, {len(self.sessions)} active")
+
+
+def _get_manager(request: web.Request) -> SessionManager:
+    return request.app['sessions']
+
+
+def _require_session(request: web.Request) -> ChatSession:
+    """按路径中的会话ID取会话，令牌放在 X-Session-Token 头或 token 查询参数中"""
+    manager = _get_manager(request)
+    session_id = request.match_info['session_id']
+    token = request.headers.get('X-Session-Token') or request.query.get('token')
+    if not manager.check_token(session_id, token):
+        raise web.HTTPForbidden(reason="invalid session token")
+    session = manager.get_session(session_id)
+    if session is None:
+        raise web.HTTPNotFound(reason="session not found")
+    return session
+
+
+async def _read_json(request: web.Request) -> dict:
+    try:
+        return await request.json() if request.can_read_body else {}
+    except ValueError:
+        raise web.HTTPBadRequest(reason="invalid json")
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "sessions": len(_get_manager(request).sessions)})
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    metrics = {"schedulers": get_scheduler_metrics()}
+    bot = _get_manager(request).bot
+    if isinstance(bot, RouterChatBot):
+        metrics["backends"] = bot.get_stats()
+    tracer = get_tracer()
+    if tracer.enabled:
+        metrics["latency"] = tracer.snapshot()
+    return web.json_response(metrics)
+
+
+async def handle_list_characters(request: web.Request) -> web.Response:
+    return web.json_response(get_character_registry().list_characters(), dumps=_dumps)
+
+
+async def handle_create_session(request: web.Request) -> web.Response:
+    body = await _read_json(request)
+    character_id = body.get('character_id') or config_manager.get_config_value('DEFAULT_CHARACTER', 'li_ming')
+    session_id = body.get('session_id')
+    if not isinstance(character_id, str) or not ID_PATTERN.match(character_id):
+        raise web.HTTPBadRequest(reason="invalid character_id")
+    if session_id is not None and (not isinstance(session_id, str) or not ID_PATTERN.match(session_id)):
+        raise web.HTTPBadRequest(reason="invalid session_id")
+    characters = await asyncio.to_thread(get_character_registry().list_characters)
+    if character_id not in characters:
+        raise web.HTTPBadRequest(reason=f"unknown character_id: {character_id}")
+
+    manager = _get_manager(request)
+    try:
+        session = await manager.create_session(character_id, session_id, body.get('token'))
+    except SessionAccessError as e:
+        raise web.HTTPForbidden(reason=str(e))
+    except SessionConflictError as e:
+        raise web.HTTPConflict(reason=str(e))
+    except ValueError as e:
+        raise web.HTTPNotFound(reason=str(e))
+    return web.json_response({
+        "session_id": session.session_id,
+        "character_id": session.chatbot.current_character_id,
+        "token": manager.get_token(session.session_id)
+    })
+
+
+async def handle_close_session(request: web.Request) -> web.Response:
+    session = _require_session(request)
+    _get_manager(request).close_session(session.session_id)
+    return web.json_response({"closed": True})
+
+
+async def handle_message_sse(request: web.Request) -> web.StreamResponse:
+    """发送一条消息，以 SSE 流式返回回复"""
+    session = _require_session(request)
+    text = (await _read_json(request)).get('text', '').strip()
+    if not text:
+        raise web.HTTPBadRequest(reason="text is required")
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache'
+    })
+    await response.prepare(request)
+
+    async with session.lock:
+        parts = []
+        try:
+            async for delta in session.chatbot.chat_stream(text):
+                parts.append(delta)
+                await response.write(_sse("delta", {"text": delta}))
+            await response.write(_sse("done", {"reply": "".join(parts)}))
+        except ChatBotError as e:
+            await response.write(_sse("error", {"message": str(e)}))
+        finally:
+            session.touch()
+
+    await response.write_eof()
+    return response
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {_dumps(data)}\n\n".encode('utf-8')
+
+
+async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
+    """WebSocket：客户端发送 {"text": ...}，服务端流式推送 delta/done/error"""
+    session = _require_session(request)
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+
+    async for msg in ws:
+        if msg.type != WSMsgType.TEXT:
+            continue
+        try:
+            text = json.loads(msg.data).get('text', '').strip()
+        except (ValueError, AttributeError):
+            await ws.send_json({"type": "error", "message": "invalid json"}, dumps=_dumps)
+            continue
+        if not text:
+            continue
+
+        async with session.lock:
+            parts = []
+            try:
+                async for delta in session.chatbot.chat_stream(text):
+                    parts.append(delta)
+                    await ws.send_json({"type": "delta", "text": delta}, dumps=_dumps)
+                await ws.send_json({"type": "done", "reply": "".join(parts)}, dumps=_dumps)
+            except ChatBotError as e:
+                await ws.send_json({"type": "error", "message": str(e)}, dumps=_dumps)
+            finally:
+                session.touch()
+
+    return ws
+
+
+def create_app(bot: Optional[AbstractChatBot] = None, store: Optional[ChatLogStore] = None) -> web.Application:
+    """创建聊天服务应用，bot 为所有会话共享的后端，store 为会话写入的聊天记录"""
+    app = web.Application()
+    app['sessions'] = SessionManager(
+        bot or get_selected_bot(),
+        idle_timeout=float(config_manager.get_config_value('SESSION_IDLE_TIMEOUT', '1800')),
+        max_sessions=int(config_manager.get_config_value('MAX_SESSIONS', '1000')),
+        secret=config_manager.get_config_value('SESSION_SECRET'),
+        store=store
+    )
+
+    async def on_startup(app: web.Application) -> None:
+        app['sessions'].start()
+
+    async def on_cleanup(app: web.Application) -> None:
+        await app['sessions'].stop()
+        await close_http_clients()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get('/health', handle_health)
+    app.router.add_get('/metrics', handle_metrics)
+    app.router.add_get('/characters', handle_list_characters)
+    app.router.add_post('/sessions', handle_create_session)
+    app.router.add_delete('/sessions/{session_id}', handle_close_session)
+    app.router.add_post('/sessions/{session_id}/messages', handle_message_sse)
+    app.router.add_get('/sessions/{session_id}/ws', handle_websocket)
+    return app
+
+
+def run_server() -> None:
+    host = config_manager.get_config_value('SERVER_HOST', '127.0.0.1')
+    port = int(config_manager.get_config_value('SERVER_PORT', '8080'))
+    # 修改 .env 中的调优参数后，各会话下一轮即生效
+    config_manager.start_watching()
+    web.run_app(create_app(), host=host, port=port)
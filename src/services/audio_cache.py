@@ -0,0 +1,195 @@
+# src/services/audio_cache.py
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+import wave
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from utils import get_logger
+
+logger = get_logger("audio_cache")
+
+# 合成与播放统一使用的 PCM 格式：24kHz、16 位、单声道
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# 中文之间的空白不影响发音
+CJK_SPACE_PATTERN = re.compile(r"(?<=[一-鿿])\s+(?=[一-鿿])")
+PUNCTUATION_SPACE_PATTERN = re.compile(r"\s*([!?.,;:~])\s*")
+REPEATED_PUNCTUATION_PATTERN = re.compile(r"([!?.,;:~])\1+")
+
+
+def normalize_text(text: str) -> str:
+    """归一化待合成的文本，使发音相同的句子命中同一缓存
+
+    统一全角/半角标点，合并空白和重复标点。
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = text.replace('。', '.').replace('、', ',')
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    text = CJK_SPACE_PATTERN.sub('', text)
+    text = PUNCTUATION_SPACE_PATTERN.sub(r'\1', text)
+    return REPEATED_PUNCTUATION_PATTERN.sub(r'\1', text)
+
+
+def write_wav(path: str, pcm: bytes) -> None:
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(CHANNELS)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+
+
+class AudioCache:
+    """按句缓存的合成音频
+
+    文件名为归一化文本的哈希，内存中按 LRU 顺序维护索引，
+    总大小超过 max_bytes 时删除最久未使用的文件。
+    只有不超过 max_chars 个字符的句子才会写入磁盘，长句很少重复出现。
+    最近用过的 PCM 另外在内存中保留不超过 memory_max_bytes，常用语命中时不读磁盘。
+    """
+
+    def __init__(self, cache_dir: str, voice: str, max_bytes: int, max_chars: int = 40,
+                 memory_max_bytes: int = 16 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.voice = voice
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self.memory_max_bytes = memory_max_bytes
+        self.memory_bytes = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """按修改时间从旧到新载入已有的缓存文件"""
+        suffix = f"_{self.voice}.wav"
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(suffix)], entry.path, stat.st_size))
+        for _, key, path, size in sorted(entries):
+            self._index[key] = (path, size)
+            self.total_bytes += size
+        self._evict()
+
+    def get_key(self, text: str) -> str:
+        return hashlib.md5(normalize_text(text).encode('utf-8')).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}_{self.voice}.wav")
+
+    def should_persist(self, text: str) -> bool:
+        return len(normalize_text(text)) <= self.max_chars
+
+    def contains(self, text: str) -> bool:
+        with self._lock:
+            return self.get_key(text) in self._index
+
+    def get(self, text: str, count: bool = True) -> Optional[bytes]:
+        """命中时返回 PCM 数据，并标记为最近使用
+
+        count 为 False 时不计入命中率，用于同一次查找中的重复检查。
+        """
+        key = self.get_key(text)
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return pcm
+            entry = self._index.get(key)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            if count:
+                self.hits += 1
+        try:
+            pcm = self._read_pcm(entry[0])
+            # 更新修改时间，重启后仍能保持 LRU 顺序
+            os.utime(entry[0])
+        except (OSError, EOFError, wave.Error) as e:
+            logger.warning(f"Dropping unreadable cached audio {entry[0]}: {e}")
+            self._discard(key, entry)
+            return None
+        if pcm is None:
+            # 旧版本按其他格式保存的文件
+            self._discard(key, entry)
+            return None
+        self.remember(key, pcm)
+        return pcm
+
+    def remember(self, key: str, pcm: bytes) -> None:
+        """把 PCM 数据放进内存缓存，超出预算时淘汰最久未使用的"""
+        if len(pcm) > self.memory_max_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self.memory_bytes -= len(old)
+            self._memory[key] = pcm
+            self.memory_bytes += len(pcm)
+            while self.memory_bytes > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self.memory_bytes -= len(evicted)
+
+    def put(self, key: str, pcm: bytes) -> None:
+        """将 PCM 数据保存为 WAV 文件并登记"""
+        path = self.get_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            write_wav(tmp_path, pcm)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache audio {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._index[key] = (path, size)
+            self.total_bytes += size
+            self._evict()
+
+    @staticmethod
+    def _read_pcm(path: str) -> Optional[bytes]:
+        with wave.open(path, 'rb') as wav:
+            if (wav.getframerate(), wav.getsampwidth(), wav.getnchannels()) != (SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS):
+                return None
+            return wav.readframes(wav.getnframes())
+
+    def _discard(self, key: str, entry: Tuple[str, int]) -> None:
+        with self._lock:
+            if self._index.get(key) == entry:
+                del self._index[key]
+                self.total_bytes -= entry[1]
+        try:
+            os.remove(entry[0])
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and len(self._index) > 1:
+            key, (path, size) = self._index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to remove cached audio {path}: {e}")
@@ -0,0 +1,264 @@
+# src/services/audio_capture.py
+import asyncio
+import threading
+import time
+import wave
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from config.config_manager import config_manager
+from utils import get_logger
+
+logger = get_logger("audio_capture")
+
+# 识别器统一使用的采集格式：16kHz、16 位、单声道
+SAMPLE_RATE = 16000
+
+
+class AudioRingBuffer:
+    """预分配的 int16 环形缓冲区，单写多读
+
+    写入方（声卡回调线程）只把数据复制进固定数组并推进写位置；读取方各自持有
+    读位置，落后超过容量时跳到最旧的可用数据并记一次溢出。写入前先在锁内推进
+    reserved_pos，读取方据此判断复制期间数据是否被覆盖。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.write_pos = 0
+        # 正在写入的数据的末尾，write_pos 到 reserved_pos 之间的旧数据可能已被覆盖
+        self.reserved_pos = 0
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def write(self, pcm) -> None:
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        skipped = max(0, len(samples) - self.capacity)
+        samples = samples[skipped:]
+        with self._cond:
+            self.reserved_pos = self.write_pos + skipped + len(samples)
+        start = (self.write_pos + skipped) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+
+        with self._cond:
+            self.write_pos = self.reserved_pos
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def read_into(self, pos: int, out: np.ndarray) -> Tuple[int, int]:
+        """从 pos 开始复制 len(out) 个采样到 out
+
+        Returns:
+            (实际读取的起始位置, 因溢出跳过的采样数)
+        """
+        skipped = 0
+        while True:
+            oldest = self.reserved_pos - self.capacity
+            if pos < oldest:
+                skipped += oldest - pos
+                pos = oldest
+            start = pos % self.capacity
+            first = min(len(out), self.capacity - start)
+            out[:first] = self._data[start:start + first]
+            out[first:] = self._data[:len(out) - first]
+            # 复制期间写入方可能追上并覆盖了这段数据，此时跳过被覆盖的部分重新读取
+            if pos >= self.reserved_pos - self.capacity:
+                return pos, skipped
+
+    def wait(self, pos: int, timeout: Optional[float] = None) -> bool:
+        """阻塞直到写位置达到 pos"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.write_pos >= pos, timeout)
+
+    async def wait_async(self, pos: int) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.write_pos >= pos:
+                    return
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            await future
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class CaptureReader:
+    """环形缓冲区的一个读取方
+
+    每次读取固定帧数，数据复制到读取方预先分配的数组中，返回该数组的 memoryview，
+    下一次读取前有效，整个过程没有逐块的内存分配。
+    """
+
+    def __init__(self, ring: AudioRingBuffer, chunk_frames: int):
+        self.ring = ring
+        self.pos = ring.write_pos
+        self.overruns = 0
+        self._out = np.empty(chunk_frames, dtype=np.int16)
+        self._view = memoryview(self._out).cast('B')
+
+    @property
+    def available(self) -> int:
+        return self.ring.write_pos - self.pos
+
+    def read(self, timeout: Optional[float] = None) -> Optional[memoryview]:
+        """阻塞读取一块音频，超时返回 None"""
+        if not self.ring.wait(self.pos + len(self._out), timeout):
+            return None
+        return self._consume()
+
+    async def read_async(self) -> memoryview:
+        await self.ring.wait_async(self.pos + len(self._out))
+        return self._consume()
+
+    def skip_to_live(self) -> None:
+        """丢弃积压的音频，从当前位置开始读"""
+        self.pos = self.ring.write_pos
+
+    def _consume(self) -> memoryview:
+        pos, skipped = self.ring.read_into(self.pos, self._out)
+        if skipped:
+            self.overruns += 1
+            logger.warning(f"Capture reader fell behind, dropped {skipped} samples")
+        self.pos = pos + len(self._out)
+        return self._view
+
+
+class MicrophoneSource:
+    """默认麦克风，使用 PyAudio 回调模式采集"""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, chunk_frames: int = 800):
+        self.sample_rate = sample_rate
+        self.chunk_frames = chunk_frames
+        self._audio = None
+        self._stream = None
+
+    def start(self, on_audio: Callable[[bytes], None]) -> None:
+        # 只有真正使用麦克风时才需要 PyAudio，文件源可以在没有声卡的环境中运行
+        import pyaudio
+
+        def callback(in_data, frame_count, time_info, status):
+            on_audio(in_data)
+            return None, pyaudio.paContinue
+
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.chunk_frames,
+            stream_callback=callback
+        )
+        self._stream.start_stream()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._audio.terminate()
+            self._stream = self._audio = None
+
+
+class WavFileSource:
+    """从 WAV 文件读取音频，代替麦克风用于测试和基准
+
+    realtime 为 True 时按实际时长送出数据；文件结束后补 trailing_silence_ms 的静音，
+    让端点检测能正常收尾。
+    """
+
+    def __init__(self, path: str, chunk_frames: int = 800, realtime: bool = True,
+                 trailing_silence_ms: int = 1500):
+        with wave.open(path, 'rb') as wav:
+            if (wav.getframerate(), wav.getsampwidth(), wav.getnchannels()) != (SAMPLE_RATE, 2, 1):
+                raise ValueError(f"{path} must be 16 kHz 16-bit mono PCM")
+            self.pcm = wav.readframes(wav.getnframes())
+        self.pcm += bytes(SAMPLE_RATE * trailing_silence_ms // 1000 * 2)
+        self.sample_rate = SAMPLE_RATE
+        self.chunk_frames = chunk_frames
+        self.realtime = realtime
+        self.finished = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / 2 / self.sample_rate
+
+    def start(self, on_audio: Callable[[bytes], None]) -> None:
+        self._thread = threading.Thread(target=self._run, args=(on_audio,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, on_audio: Callable[[bytes], None]) -> None:
+        chunk_bytes = self.chunk_frames * 2
+        interval = self.chunk_frames / self.sample_rate
+        started = time.monotonic()
+        for i, offset in enumerate(range(0, len(self.pcm), chunk_bytes)):
+            if self._stopped.is_set():
+                break
+            if self.realtime:
+                delay = started + i * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            on_audio(self.pcm[offset:offset + chunk_bytes])
+        self.finished.set()
+
+
+class AudioCapture:
+    """共享的音频采集
+
+    只打开一个采集流，数据写入环形缓冲区，识别器和端点检测各自通过 reader()
+    读取；两轮对话之间的音频也保留在缓冲区中，不会丢失。
+    """
+
+    def __init__(self, source=None, capacity_seconds: float = 30):
+        self.source = source or MicrophoneSource()
+        self.ring = AudioRingBuffer(int(self.source.sample_rate * capacity_seconds))
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._started:
+                self.source.start(self.ring.write)
+                self._started = True
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._started:
+                self.source.stop()
+                self._started = False
+
+    def reader(self, chunk_frames: int) -> CaptureReader:
+        """从当前位置开始读取的新读取方"""
+        reader = CaptureReader(self.ring, chunk_frames)
+        self.start()
+        return reader
+
+
+_capture: Optional[AudioCapture] = None
+_capture_lock = threading.Lock()
+
+
+def get_audio_capture() -> AudioCapture:
+    """获取进程内共享的麦克风采集"""
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            seconds = float(config_manager.get_config_value('AUDIO_CAPTURE_SECONDS', '30'))
+            _capture = AudioCapture(capacity_seconds=seconds)
+        return _capture
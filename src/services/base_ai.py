@@ -1,4 +1,14 @@
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Optional
+
+from config.config_manager import config_manager
+from services.http_pool import get_http_client, get_timeout
+from services.scheduler import Priority, get_scheduler
+from utils import get_logger
+
+if TYPE_CHECKING:
+    import openai
+
+logger = get_logger("base_ai")
 
 
 class ChatServiceError(Exception):
@@ -11,30 +21,68 @@ class AbstractChatBot:
 
     def __init__(self):
         self.client = self.get_client()
-        self.model = self.get_model_name()
+        # 同一后端的所有实例共享一个调度器
+        self.scheduler = get_scheduler(self.get_backend_name())
+
+    def get_backend_name(self) -> str:
+        """后端名称，用于共享调度器和读取并发配置"""
+        return type(self).__name__.lower()
 
-    def get_client(self):
+    def get_client(self) -> "openai.AsyncOpenAI":
         raise NotImplementedError()
 
+    @staticmethod
+    def create_async_client(base_url: str, api_key: str) -> "openai.AsyncOpenAI":
+        """创建使用共享连接池的 OpenAI 兼容异步客户端"""
+        # openai 导入较慢，到真正创建后端时才导入
+        import openai
+
+        return openai.AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=get_timeout(),
+            http_client=get_http_client(base_url)
+        )
+
     def get_model_name(self) -> str:
+        """每次请求时读取，配置的模型变化后下一轮即生效"""
         raise NotImplementedError()
 
     def get_temperature(self) -> float:
+        """未配置 <后端名>_TEMPERATURE 时使用的默认温度"""
         return 1.0
 
+    def _resolve_temperature(self, temperature: Optional[float]) -> float:
+        if temperature is not None:
+            return temperature
+        configured = config_manager.settings.temperatures.get(self.get_backend_name())
+        return self.get_temperature() if configured is None else configured
+
+    async def warm_up(self) -> None:
+        """预先建立到服务的连接，第一轮对话不再等待 TCP/TLS 握手"""
+        try:
+            await self.client.with_options(max_retries=0).models.list()
+        except Exception as e:
+            # 不支持列出模型的服务也已经建立了连接，失败不影响使用
+            logger.debug(f"{self.get_backend_name()} warm-up request failed: {e}")
+
     async def send_message(
             self,
             messages: List[Dict[str, str]],
-            temperature: float = 1.3,
-            max_tokens: Optional[int] = None
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+            session_id: Optional[str] = None,
+            priority: Priority = Priority.INTERACTIVE
     ) -> str:
         """
         发送消息到 AI 服务
 
         Args:
             messages: 消息历史列表
-            temperature: 温度参数
+            temperature: 温度参数，未指定时使用该后端配置的温度
             max_tokens: 最大标记数
+            session_id: 发起请求的会话，用于排队时在会话间轮转
+            priority: 请求优先级
 
         Returns:
             AI 的响应文本
@@ -43,13 +91,67 @@ class AbstractChatBot:
             ChatServiceError: 当 API 调用失败时
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            async with self.scheduler.slot(session_id, priority):
+                response = await self.client.chat.completions.create(
+                    model=self.get_model_name(),
+                    messages=messages,
+                    temperature=self._resolve_temperature(temperature),
+                    max_tokens=max_tokens
+                )
             return response.choices[0].message.content
 
         except Exception as e:
             raise ChatServiceError(f"API call failed: {str(e)}")
+
+    async def stream_message(
+            self,
+            messages: List[Dict[str, str]],
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+            session_id: Optional[str] = None,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """
+        以流式方式发送消息到 AI 服务
+
+        Args:
+            messages: 消息历史列表
+            temperature: 温度参数，未指定时使用该后端配置的温度
+            max_tokens: 最大标记数
+            session_id: 发起请求的会话，用于排队时在会话间轮转
+            priority: 请求优先级
+
+        Yields:
+            AI 响应的增量文本
+
+        Raises:
+            ChatServiceError: 当 API 调用失败时
+        """
+        try:
+            # 整个流式响应期间占用一个名额
+            async with self.scheduler.slot(session_id, priority):
+                response = await self.client.chat.completions.create(
+                    model=self.get_model_name(),
+                    messages=messages,
+                    temperature=self._resolve_temperature(temperature),
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                try:
+                    async for chunk in response:
+                        delta = self._get_delta(chunk)
+                        if delta:
+                            yield delta
+                finally:
+                    # 提前结束时也要归还连接
+                    await response.close()
+
+        except Exception as e:
+            raise ChatServiceError(f"API call failed: {str(e)}")
+
+    @staticmethod
+    def _get_delta(chunk) -> Optional[str]:
+        """从流式响应块中提取增量文本"""
+        if not chunk.choices:
+            return None
+        return chunk.choices[0].delta.content
@@ -1,5 +1,43 @@
-from services.deep_seek import Deepseekbot
+import importlib
+from typing import Type
 
+from config.config_manager import config_manager
+from services.base_ai import AbstractChatBot
 
-def get_selected_bot():
-    return Deepseekbot()
\ No newline at end of file
+# 后端按名称登记为 "模块:类"，只导入配置中选用的后端
+BACKENDS = {
+    'deepseek': 'services.deep_seek:Deepseekbot',
+    'chatglm': 'services.chatglm:Charglm',
+}
+
+
+def load_backend(name: str) -> Type[AbstractChatBot]:
+    """导入并返回指定名称的后端类"""
+    module_name, class_name = BACKENDS[name].split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_selected_bot() -> AbstractChatBot:
+    """按 CHAT_BACKENDS 配置创建后端，配置多个时通过路由器选择"""
+    names = [
+        name.strip().lower()
+        for name in config_manager.get_config_value('CHAT_BACKENDS', 'deepseek').split(',')
+        if name.strip()
+    ]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown chat backends: {', '.join(unknown)}")
+
+    backends = [load_backend(name)() for name in names]
+    if len(backends) == 1:
+        return backends[0]
+
+    from services.router import RouterChatBot
+
+    return RouterChatBot(
+        backends,
+        hedge=config_manager.get_config_value('ROUTER_HEDGE', 'true').lower() == 'true',
+        hedge_factor=float(config_manager.get_config_value('ROUTER_HEDGE_FACTOR', '1.0')),
+        hedge_min_delay=float(config_manager.get_config_value('ROUTER_HEDGE_MIN_DELAY', '0.3')),
+        hedge_max_delay=float(config_manager.get_config_value('ROUTER_HEDGE_MAX_DELAY', '5.0'))
+    )
@@ -1,5 +1,4 @@
 # src/services/chat_service.py
-from zhipuai import ZhipuAI
 from config.config_manager import config_manager
 from services.base_ai import AbstractChatBot
 
@@ -8,8 +7,13 @@ class Charglm(AbstractChatBot):
     """AI 聊天服务"""
 
     def get_client(self):
+        # 智谱开放平台提供 OpenAI 兼容接口，可直接使用异步客户端
         api_key = config_manager.get_api_key()
-        return ZhipuAI(api_key=api_key)
+        base_url = config_manager.get_config_value('ZHIPU_BASE_URL', 'https://open.bigmodel.cn/api/paas/v4/')
+        return self.create_async_client(base_url, api_key)
+
+    def get_backend_name(self) -> str:
+        return "chatglm"
 
     def get_model_name(self) -> str:
-        return config_manager.get_config_value('MODEL_NAME', 'charglm-4')
\ No newline at end of file
+        return config_manager.settings.model_name
\ No newline at end of file
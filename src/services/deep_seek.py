@@ -1,13 +1,14 @@
-import openai
+from config.config_manager import config_manager
 from services.base_ai import AbstractChatBot
 
 
 class Deepseekbot(AbstractChatBot):
     def get_client(self):
-        client = openai.OpenAI(
-            base_url="http://localhost:11434/v1",
-            api_key="nokeyneeded")
-        return client
+        base_url = config_manager.get_config_value('DEEPSEEK_BASE_URL', 'http://localhost:11434/v1')
+        return self.create_async_client(base_url, "nokeyneeded")
+
+    def get_backend_name(self) -> str:
+        return "deepseek"
 
     def get_model_name(self) -> str:
         return "deepseek-r1:14b"
@@ -1,9 +1,16 @@
-from services.ms_voice_detector import MSVoiceDetector
-from services.speech_assistant import SpeechAssistant
+from typing import TYPE_CHECKING
+
 from config.config_manager import config_manager
 
+# 语音服务依赖的 SDK 导入较慢，在创建实例时才导入，便于启动时并行预热
+if TYPE_CHECKING:
+    from services.ms_voice_detector import MSVoiceDetector
+    from services.speech_assistant import SpeechAssistant
+
+
+def get_voice_detector() -> "MSVoiceDetector":
+    from services.ms_voice_detector import MSVoiceDetector
 
-def get_voice_detector() -> MSVoiceDetector:
     speech_key = config_manager.get_config_value('speech_key')
     service_region = config_manager.get_config_value("service_region")
 
@@ -11,12 +18,21 @@ def get_voice_detector() -> MSVoiceDetector:
     return detector
 
 
-def get_speech_instance() -> SpeechAssistant:
+def get_speech_instance() -> "SpeechAssistant":
+    from services.speech_assistant import SpeechAssistant
+
     speech_key = config_manager.get_config_value('speech_key')
     service_region = config_manager.get_config_value("service_region")
 
+    cache_max_mb = int(config_manager.get_config_value('TTS_CACHE_MAX_MB', '200'))
+    cache_max_chars = int(config_manager.get_config_value('TTS_CACHE_MAX_CHARS', '40'))
+    synthesizers = int(config_manager.get_config_value('TTS_SYNTHESIZERS', '2'))
+
     return SpeechAssistant(
         speech_key,
         service_region,
         "data",
-        "zh-CN-XiaomoNeural")
+        "zh-CN-XiaomoNeural",
+        cache_max_bytes=cache_max_mb * 1024 * 1024,
+        cache_max_chars=cache_max_chars,
+        synthesizers=synthesizers)
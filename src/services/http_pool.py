@@ -0,0 +1,45 @@
+# src/services/http_pool.py
+from typing import Dict
+
+import httpx
+
+from config.config_manager import config_manager
+
+# 按 base_url 共享的 HTTP 连接池，多轮对话复用 TCP/TLS 连接
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_timeout() -> httpx.Timeout:
+    """读取 LLM 请求的连接/读取超时配置（秒）"""
+    connect = float(config_manager.get_config_value('LLM_CONNECT_TIMEOUT', '5'))
+    read = float(config_manager.get_config_value('LLM_READ_TIMEOUT', '120'))
+    return httpx.Timeout(read, connect=connect)
+
+
+def get_limits() -> httpx.Limits:
+    """读取连接池大小配置"""
+    max_connections = int(config_manager.get_config_value('LLM_MAX_CONNECTIONS', '20'))
+    keepalive_expiry = float(config_manager.get_config_value('LLM_KEEPALIVE_EXPIRY', '60'))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """获取指定 base_url 的共享异步 HTTP 客户端"""
+    key = base_url.rstrip('/')
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=get_timeout(), limits=get_limits())
+        _clients[key] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """关闭所有共享的 HTTP 客户端"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -1,8 +1,42 @@
-import azure.cognitiveservices.speech as speechsdk
+import asyncio
 import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Optional
+
+import azure.cognitiveservices.speech as speechsdk
+
+from services.tracing import get_tracer
+from utils import get_logger
+
+logger = get_logger("ms_voice_detector")
+
+# 会话意外结束后的重启退避（秒）和连续重启次数上限
+RESTART_BASE_DELAY = 1.0
+RESTART_MAX_DELAY = 30.0
+MAX_RESTARTS = 6
+# 重试也无法恢复的错误，不再重启
+FATAL_ERROR_CODES = (
+    speechsdk.CancellationErrorCode.AuthenticationFailure,
+    speechsdk.CancellationErrorCode.Forbidden,
+)
+
+
+@dataclass
+class SpeechEvent:
+    """识别事件：final 为 False 时是说话过程中的中间结果"""
+    text: str
+    final: bool
+    timestamp: float = field(default_factory=time.monotonic)
 
 
 class MSVoiceDetector:
+    """基于 Azure 连续识别的语音检测器
+
+    只建立一个识别会话并持续运行，识别结果和中间结果由 SDK 线程投递到
+    asyncio 队列，上一句话结束后下一句的识别已经在进行中。没有人在等待
+    识别结果时（例如正在播放回复）到达的事件直接丢弃，不会被当成下一句输入。
+    """
+
     def __init__(self, speech_key, service_region):
         """
         初始化语音检测器
@@ -24,32 +58,155 @@ class MSVoiceDetector:
             audio_config=self.audio_input_config,
         )
 
-    def get_speech_text(self) -> str:
-        """开始录音并等待说话结束"""
-        # 用于同步的事件
-        done = False
-        recognized_text = ""
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._events: Optional[asyncio.Queue] = None
+        self._running = False
+        self._listening = False
+        self._restart_task: Optional[asyncio.Task] = None
+        self._restarts = 0
+        self._fatal_error: Optional[str] = None
+        self.tracer = get_tracer()
+
+        # 回调只注册一次
+        self.speech_recognizer.recognizing.connect(self._handle_recognizing)
+        self.speech_recognizer.recognized.connect(self._handle_recognized)
+        self.speech_recognizer.canceled.connect(self._handle_canceled)
+        self.speech_recognizer.session_stopped.connect(self._handle_session_stopped)
+
+    async def start(self) -> None:
+        """启动连续识别，重复调用无副作用"""
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        if self._events is None:
+            self._events = asyncio.Queue()
+        self._running = True
+        try:
+            await asyncio.to_thread(lambda: self.speech_recognizer.start_continuous_recognition_async().get())
+        except BaseException:
+            self._running = False
+            raise
+        logger.info("Continuous recognition started")
+
+    async def stop(self) -> None:
+        """停止连续识别"""
+        if self._restart_task is not None and not self._restart_task.done():
+            self._restart_task.cancel()
+        if not self._running:
+            return
+        self._running = False
+        await asyncio.to_thread(lambda: self.speech_recognizer.stop_continuous_recognition_async().get())
+        logger.info("Continuous recognition stopped")
+
+    async def events(self) -> AsyncIterator[SpeechEvent]:
+        """依次产出中间结果和最终结果
+
+        Raises:
+            RuntimeError: 会话多次重启失败或遇到认证错误，已放弃识别
+        """
+        if self._restart_task is not None:
+            # 正在退避等待重启时不立即重连；放弃重启时这里抛出原因
+            await asyncio.shield(self._restart_task)
+        await self.start()
+        # 丢掉上次等待结束后残留的事件
+        while not self._events.empty():
+            self._events.get_nowait()
+        self._listening = True
+        try:
+            while True:
+                event = await self._events.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._listening = False
+
+    async def listen(self, on_partial: Optional[Callable[[str], None]] = None) -> str:
+        """等待下一句完整的识别结果
+
+        Args:
+            on_partial: 收到中间结果时调用，参数为当前识别出的文本
+
+        Returns:
+            识别出的文本，识别会话异常结束时返回空字符串
+        """
+        last_partial: Optional[SpeechEvent] = None
+        events = self.events()
+        try:
+            async for event in events:
+                if event.final:
+                    if last_partial is not None:
+                        # 最后一个中间结果到最终结果的间隔，近似说完到出结果的延迟
+                        self.tracer.record("asr_final", event.timestamp - last_partial.timestamp)
+                    return event.text
+                last_partial = event
+                if on_partial:
+                    on_partial(event.text)
+        finally:
+            # 立即结束等待，之后到达的事件不再入队
+            await events.aclose()
+        return ""
+
+    def get_speech_text(self, on_partial: Optional[Callable[[str], None]] = None) -> str:
+        """在其他线程中同步等待下一句话，需要事件循环已通过 start() 启动识别"""
+        if self._loop is None:
+            raise RuntimeError("MSVoiceDetector.start() must be awaited first")
+        return asyncio.run_coroutine_threadsafe(self.listen(on_partial), self._loop).result()
+
+    def _put(self, event: Optional[SpeechEvent]) -> None:
+        # 由 SDK 线程调用，停止后或没有人在等待时到达的事件直接丢弃
+        if self._running and self._listening and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+
+    def _handle_recognizing(self, evt) -> None:
+        if evt.result.text:
+            self._put(SpeechEvent(evt.result.text, final=False))
 
-        def handle_result(evt):
-            """处理识别结果"""
-            nonlocal done, recognized_text
-            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                print(f"识别到的文本: {evt.result.text}")
-                recognized_text = evt.result.text
-                done = True
+    def _handle_recognized(self, evt) -> None:
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+            print(f"识别到的文本: {evt.result.text}")
+            self._restarts = 0
+            self._put(SpeechEvent(evt.result.text, final=True))
 
-        # 设置回调
-        self.speech_recognizer.recognized.connect(handle_result)
-        self.speech_recognizer.session_stopped.connect(lambda evt: setattr(done, 'value', True))
+    def _handle_canceled(self, evt) -> None:
+        logger.warning(f"Speech recognition canceled: {evt.cancellation_details.reason}")
+        if evt.cancellation_details.reason == speechsdk.CancellationReason.Error:
+            logger.error(f"Error details: {evt.cancellation_details.error_details}")
+            if evt.cancellation_details.code in FATAL_ERROR_CODES:
+                self._fatal_error = f"{evt.cancellation_details.code}: {evt.cancellation_details.error_details}"
 
-        # 开始识别
-        self.speech_recognizer.start_continuous_recognition()
+    def _handle_session_stopped(self, evt) -> None:
+        if not self._running:
+            return
+        # 会话意外结束：唤醒等待方，并在退避后重新开始识别
+        logger.warning("Recognition session stopped unexpectedly")
+        self._put(None)
+        self._loop.call_soon_threadsafe(self._schedule_restart)
 
-        # 等待识别结束
-        while not done:
-            time.sleep(0.1)
+    def _schedule_restart(self) -> None:
+        self._running = False
+        if self._restart_task is None or self._restart_task.done():
+            self._restart_task = self._loop.create_task(self._restart())
+            self._restart_task.add_done_callback(self._on_restart_done)
 
-        # 停止识别
-        self.speech_recognizer.stop_continuous_recognition()
-        return recognized_text
+    async def _restart(self) -> None:
+        """按指数退避重启识别，认证错误或连续失败过多时放弃"""
+        while True:
+            if self._fatal_error:
+                raise RuntimeError(f"Speech recognition failed: {self._fatal_error}")
+            if self._restarts >= MAX_RESTARTS:
+                raise RuntimeError(f"Speech recognition stopped after {MAX_RESTARTS} restarts")
+            delay = min(RESTART_MAX_DELAY, RESTART_BASE_DELAY * 2 ** self._restarts)
+            self._restarts += 1
+            logger.warning(f"Restarting recognition in {delay:.1f}s ({self._restarts}/{MAX_RESTARTS})")
+            await asyncio.sleep(delay)
+            try:
+                await self.start()
+                return
+            except Exception as e:
+                logger.error(f"Failed to restart recognition: {e}")
 
+    @staticmethod
+    def _on_restart_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Giving up on speech recognition: {task.exception()}")
@@ -0,0 +1,132 @@
+# src/services/playback.py
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Optional
+
+import pyaudio
+
+from services.audio_cache import CHANNELS, SAMPLE_RATE, SAMPLE_WIDTH
+from utils import get_logger
+
+logger = get_logger("playback")
+
+
+class _Clip:
+    """排队等待播放的一段 PCM"""
+
+    def __init__(self, pcm: bytes):
+        self.pcm = pcm
+        self.offset = 0
+        self.done: Future = Future()
+        # 置为运行状态，等待方被取消时不会连带取消这个 Future
+        self.done.set_running_or_notify_cancel()
+
+
+class PlaybackEngine:
+    """常驻的音频播放引擎
+
+    输出设备只打开一次，由声卡回调按需从队列中取 PCM 数据，没有数据时输出静音。
+    play() 立即返回一个 Future，片段播放完毕或被 stop() 打断时由回调线程完成，
+    结果为实际送出的字节数，调用方无需轮询。
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, sample_width: int = SAMPLE_WIDTH,
+                 channels: int = CHANNELS, chunk_frames: int = 1024):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.chunk_frames = chunk_frames
+        self.frame_bytes = sample_width * channels
+        # 已送入声卡的字节数，用于计算实际播放了多少
+        self.played_bytes = 0
+        self._clips: Deque[_Clip] = deque()
+        self._lock = threading.Lock()
+        self._audio: Optional[pyaudio.PyAudio] = None
+        self._stream = None
+
+    def start(self) -> None:
+        """打开输出设备"""
+        with self._lock:
+            if self._stream is not None:
+                return
+            self._audio = pyaudio.PyAudio()
+            self._stream = self._audio.open(
+                format=self._audio.get_format_from_width(self.sample_width),
+                channels=self.channels,
+                rate=self.sample_rate,
+                output=True,
+                frames_per_buffer=self.chunk_frames,
+                stream_callback=self._callback
+            )
+        self._stream.start_stream()
+        logger.info(f"Audio output opened at {self.sample_rate} Hz")
+
+    def play(self, pcm: bytes) -> Future:
+        """将 PCM 加入播放队列，返回播放结束时完成的 Future"""
+        self.start()
+        clip = _Clip(pcm[:len(pcm) - len(pcm) % self.frame_bytes])
+        if not clip.pcm:
+            clip.done.set_result(0)
+            return clip.done
+        with self._lock:
+            self._clips.append(clip)
+        return clip.done
+
+    def play_blocking(self, pcm: bytes) -> int:
+        return self.play(pcm).result()
+
+    def is_playing(self) -> bool:
+        with self._lock:
+            return bool(self._clips)
+
+    def stop(self) -> None:
+        """立即停止播放并清空队列"""
+        with self._lock:
+            clips = list(self._clips)
+            self._clips.clear()
+        for clip in clips:
+            clip.done.set_result(clip.offset)
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            stream, audio = self._stream, self._audio
+            self._stream = self._audio = None
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+            audio.terminate()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        size = frame_count * self.frame_bytes
+        buffer = bytearray()
+        finished = []
+        with self._lock:
+            while self._clips and len(buffer) < size:
+                clip = self._clips[0]
+                chunk = clip.pcm[clip.offset:clip.offset + size - len(buffer)]
+                buffer += chunk
+                clip.offset += len(chunk)
+                if clip.offset >= len(clip.pcm):
+                    self._clips.popleft()
+                    finished.append(clip)
+            self.played_bytes += len(buffer)
+        for clip in finished:
+            clip.done.set_result(clip.offset)
+        # 队列为空时补静音，保持设备常开
+        buffer += bytes(size - len(buffer))
+        return bytes(buffer), pyaudio.paContinue
+
+
+_engine: Optional[PlaybackEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_playback_engine() -> PlaybackEngine:
+    """获取进程内共享的播放引擎"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+        return _engine
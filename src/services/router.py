@@ -0,0 +1,245 @@
+# src/services/router.py
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from services.base_ai import AbstractChatBot, ChatServiceError
+from services.scheduler import Priority
+from utils import get_logger
+
+logger = get_logger("router")
+
+
+class BackendStats:
+    """单个后端的滚动延迟与错误统计"""
+
+    def __init__(self, window: int = 50, alpha: float = 0.3, failure_threshold: int = 3,
+                 cooldown: float = 30.0):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ttft_ewma: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self._ttfts: Deque[float] = deque(maxlen=window)
+        self._totals: Deque[float] = deque(maxlen=window)
+
+    def record_first_token(self, ttft: float) -> None:
+        self._ttfts.append(ttft)
+        if self.ttft_ewma is None:
+            self.ttft_ewma = ttft
+        else:
+            self.ttft_ewma = self.alpha * ttft + (1 - self.alpha) * self.ttft_ewma
+
+    def record_success(self, total: float) -> None:
+        self.requests += 1
+        self._totals.append(total)
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.errors += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            # 熔断：冷却期内不再优先路由到该后端
+            self.unhealthy_until = time.monotonic() + self.cooldown
+
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def ttft_samples(self) -> int:
+        return len(self._ttfts)
+
+    def ttft_percentile(self, percentile: float) -> Optional[float]:
+        if not self._ttfts:
+            return None
+        ttfts = sorted(self._ttfts)
+        return ttfts[min(len(ttfts) - 1, int(len(ttfts) * percentile))]
+
+    def snapshot(self) -> dict:
+        p50 = self.ttft_percentile(0.5)
+        p95 = self.ttft_percentile(0.95)
+        return {
+            "healthy": self.is_healthy(),
+            "requests": self.requests,
+            "errors": self.errors,
+            "ttft_ewma_ms": round(self.ttft_ewma * 1000, 1) if self.ttft_ewma is not None else None,
+            "ttft_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "ttft_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class RouterChatBot(AbstractChatBot):
+    """多后端路由
+
+    每轮选择首字延迟最低的健康后端；主后端在基于其 p95 首字延迟的期限内
+    没有返回第一个片段时，可以同时向第二个后端发出对冲请求，先出字的一方胜出。
+    首字之前失败的后端会自动切换到下一个。
+    """
+
+    def __init__(self, backends: List[AbstractChatBot], hedge: bool = True,
+                 hedge_factor: float = 1.0, hedge_min_delay: float = 0.3,
+                 hedge_max_delay: float = 5.0, default_ttft: float = 2.0,
+                 min_samples: int = 5):
+        if not backends:
+            raise ValueError("RouterChatBot requires at least one backend")
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_factor = hedge_factor
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.default_ttft = default_ttft
+        self.min_samples = min_samples
+        self.stats: Dict[int, BackendStats] = {id(backend): BackendStats() for backend in backends}
+        super().__init__()
+
+    def get_client(self):
+        return None
+
+    def get_model_name(self) -> str:
+        return "router"
+
+    def get_backend_name(self) -> str:
+        return "router"
+
+    async def warm_up(self) -> None:
+        await asyncio.gather(*(backend.warm_up() for backend in self.backends))
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {
+            backend.get_backend_name(): self.stats[id(backend)].snapshot()
+            for backend in self.backends
+        }
+
+    def rank_backends(self) -> List[AbstractChatBot]:
+        """按健康状态和首字延迟排序，未有统计的后端按配置顺序使用默认延迟"""
+        def key(item: Tuple[int, AbstractChatBot]):
+            order, backend = item
+            stats = self.stats[id(backend)]
+            ttft = stats.ttft_ewma if stats.ttft_ewma is not None else self.default_ttft
+            return not stats.is_healthy(), ttft, order
+
+        return [backend for _, backend in sorted(enumerate(self.backends), key=key)]
+
+    def get_hedge_delay(self, backend: AbstractChatBot) -> float:
+        """主后端的对冲期限：p95 首字延迟乘以系数"""
+        stats = self.stats[id(backend)]
+        p95 = stats.ttft_percentile(0.95)
+        if p95 is None or stats.ttft_samples < self.min_samples:
+            p95 = self.default_ttft
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, p95 * self.hedge_factor))
+
+    async def send_message(
+            self,
+            messages: List[Dict[str, str]],
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+            session_id: Optional[str] = None,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> str:
+        parts = [
+            delta async for delta in
+            self.stream_message(messages, temperature, max_tokens, session_id, priority)
+        ]
+        return "".join(parts)
+
+    async def stream_message(
+            self,
+            messages: List[Dict[str, str]],
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+            session_id: Optional[str] = None,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[str]:
+        candidates = self.rank_backends()
+        # 后台任务不值得占用第二个后端
+        hedge = self.hedge and priority == Priority.INTERACTIVE
+
+        def start(backend: AbstractChatBot) -> "_Attempt":
+            # 未指定温度时由各后端使用自己的默认值，对冲和切换后也与实际后端一致
+            stream = backend.stream_message(messages, temperature, max_tokens, session_id, priority)
+            return _Attempt(backend, stream)
+
+        pending: List[_Attempt] = []
+        winner: Optional[_Attempt] = None
+        winner_ttft = 0.0
+        last_error: Optional[Exception] = None
+        try:
+            pending.append(start(candidates.pop(0)))
+            while winner is None:
+                timeout = None
+                if hedge and candidates and len(pending) == 1:
+                    timeout = max(0.0, pending[0].started + self.get_hedge_delay(pending[0].backend)
+                                  - time.monotonic())
+
+                done, _ = await asyncio.wait(
+                    [attempt.first for attempt in pending],
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(f"Hedging request to {candidates[0].get_backend_name()}")
+                    pending.append(start(candidates.pop(0)))
+                    continue
+
+                now = time.monotonic()
+                for attempt in [attempt for attempt in pending if attempt.first in done]:
+                    pending.remove(attempt)
+                    error = attempt.first.exception()
+                    if error is None or isinstance(error, StopAsyncIteration):
+                        if winner is None:
+                            # 在取消其他请求之前记下首字时间，取消耗时不计入
+                            winner, winner_ttft = attempt, now - attempt.started
+                        else:
+                            pending.append(attempt)
+                        continue
+                    last_error = error
+                    self.stats[id(attempt.backend)].record_failure()
+                    await attempt.stream.aclose()
+
+                if winner is None and not pending:
+                    if not candidates:
+                        raise last_error or ChatServiceError("All backends failed")
+                    pending.append(start(candidates.pop(0)))
+        finally:
+            # 取消落败或未完成的请求
+            decided = time.monotonic()
+            for attempt in pending:
+                if winner is not None and not attempt.first.done():
+                    # 对冲落败时还没出字，按已等待时间记一个首字延迟下限
+                    self.stats[id(attempt.backend)].record_first_token(decided - attempt.started)
+                await attempt.cancel()
+
+        stats = self.stats[id(winner.backend)]
+        stats.record_first_token(winner_ttft)
+        try:
+            error = winner.first.exception()
+            if error is None:
+                yield winner.first.result()
+                async for delta in winner.stream:
+                    yield delta
+        except Exception:
+            stats.record_failure()
+            raise
+        finally:
+            await winner.stream.aclose()
+        stats.record_success(time.monotonic() - winner.started)
+
+
+class _Attempt:
+    """对单个后端的一次流式请求"""
+
+    def __init__(self, backend: AbstractChatBot, stream: AsyncIterator[str]):
+        self.backend = backend
+        self.stream = stream
+        self.started = time.monotonic()
+        self.first: asyncio.Task = asyncio.ensure_future(stream.__anext__())
+
+    async def cancel(self) -> None:
+        self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        await self.stream.aclose()
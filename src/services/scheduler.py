@@ -0,0 +1,182 @@
+# src/services/scheduler.py
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, Hashable, Optional
+
+from config.config_manager import config_manager
+
+
+class Priority(IntEnum):
+    """请求优先级，数值越小越先执行"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class SchedulerMetrics:
+    """调度器的排队指标"""
+
+    def __init__(self, window: int = 1000):
+        self.submitted = 0
+        self.completed = 0
+        # 排队期间被取消的请求，不计入 completed
+        self.cancelled = 0
+        # 已拿到名额的请求数，平均等待时间以此为分母
+        self.waited = 0
+        self.max_queue_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=window)
+
+    def record_wait(self, wait: float) -> None:
+        self.waited += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self._recent_waits.append(wait)
+
+    def wait_percentile(self, percentile: float) -> float:
+        if not self._recent_waits:
+            return 0.0
+        waits = sorted(self._recent_waits)
+        return waits[min(len(waits) - 1, int(len(waits) * percentile))]
+
+
+class RequestScheduler:
+    """后端请求调度器
+
+    限制同时进行的请求数，超出的请求排队：高优先级（交互轮次）先于低优先级
+    （摘要等后台任务）；同一优先级内按会话轮转，单个会话无法占满队列。
+    """
+
+    def __init__(self, name: str, max_in_flight: int):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.in_flight = 0
+        self.metrics = SchedulerMetrics()
+        # 每个优先级一个按会话分组的队列，OrderedDict 的顺序即轮转顺序
+        self._queues: Dict[Priority, "OrderedDict[Hashable, Deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+
+    @asynccontextmanager
+    async def slot(self, session_id: Optional[Hashable] = None,
+                   priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[None]:
+        """占用一个请求名额，退出时归还"""
+        await self.acquire(session_id, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, session_id: Optional[Hashable] = None,
+                      priority: Priority = Priority.INTERACTIVE) -> None:
+        self.metrics.submitted += 1
+        if self.in_flight < self.max_in_flight and not self.queue_depth():
+            self.in_flight += 1
+            self.metrics.record_wait(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._queues[priority].setdefault(session_id, deque())
+        waiters.append(future)
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.queue_depth())
+
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            self.metrics.cancelled += 1
+            if future.done() and not future.cancelled():
+                # 名额已经分配给了这个请求，转交给下一个
+                self._free_slot()
+            else:
+                self._remove_waiter(priority, session_id, future)
+            raise
+        self.metrics.record_wait(time.monotonic() - start)
+
+    def release(self) -> None:
+        self.metrics.completed += 1
+        self._free_slot()
+
+    def _free_slot(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        priorities = [priority] if priority is not None else list(Priority)
+        return sum(len(waiters) for p in priorities for waiters in self._queues[p].values())
+
+    def snapshot(self) -> dict:
+        """当前的排队与等待时间指标"""
+        return {
+            "name": self.name,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": {priority.name.lower(): self.queue_depth(priority) for priority in Priority},
+            "max_queue_depth": self.metrics.max_queue_depth,
+            "submitted": self.metrics.submitted,
+            "completed": self.metrics.completed,
+            "cancelled": self.metrics.cancelled,
+            "wait_ms": {
+                "avg": round(self.metrics.wait_total / max(1, self.metrics.waited) * 1000, 2),
+                "p50": round(self.metrics.wait_percentile(0.5) * 1000, 2),
+                "p95": round(self.metrics.wait_percentile(0.95) * 1000, 2),
+                "max": round(self.metrics.wait_max * 1000, 2),
+            },
+        }
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_in_flight:
+            future = self._next_waiter()
+            if future is None:
+                return
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue:
+                session_id, waiters = queue.popitem(last=False)
+                future = waiters.popleft()
+                if waiters:
+                    # 该会话还有请求，排到本优先级的队尾
+                    queue[session_id] = waiters
+                if not future.done():
+                    return future
+        return None
+
+    def _remove_waiter(self, priority: Priority, session_id: Optional[Hashable],
+                       future: asyncio.Future) -> None:
+        waiters = self._queues[priority].get(session_id)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+        except ValueError:
+            return
+        if not waiters:
+            del self._queues[priority][session_id]
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+
+
+def get_scheduler(name: str) -> RequestScheduler:
+    """获取指定后端的共享调度器
+
+    并发上限读取 <NAME>_MAX_IN_FLIGHT，未配置时使用 LLM_MAX_IN_FLIGHT。
+    """
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        default = config_manager.get_config_value('LLM_MAX_IN_FLIGHT', '2')
+        max_in_flight = int(config_manager.get_config_value(f'{name.upper()}_MAX_IN_FLIGHT', default))
+        scheduler = _schedulers[name] = RequestScheduler(name, max_in_flight)
+    return scheduler
+
+
+def get_scheduler_metrics() -> Dict[str, dict]:
+    """所有后端调度器的指标"""
+    return {name: scheduler.snapshot() for name, scheduler in _schedulers.items()}
@@ -1,8 +1,16 @@
 import os
-import hashlib
-import azure.cognitiveservices.speech as speechsdk
-import pygame
+import queue
+import threading
 import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import azure.cognitiveservices.speech as speechsdk
+from services.audio_cache import AudioCache, CHANNELS, SAMPLE_RATE, SAMPLE_WIDTH, write_wav
+from services.playback import get_playback_engine
+from services.tracing import get_tracer
 from utils import get_logger
 
 logger = get_logger("speech_assistant")
@@ -12,6 +20,8 @@ def play_audio(file_path):
     """
     播放给定路径的音频文件
 
+    WAV 文件转换成播放引擎的格式后播放，其他格式交给 pygame 播放。
+
     :param file_path: 音频文件的路径
     """
     # 检查文件是否存在
@@ -19,22 +29,63 @@ def play_audio(file_path):
         logger.info(f"错误：文件 '{file_path}' 不存在。")
         return
 
-    # 初始化 pygame mixer
-    pygame.mixer.init()
+    try:
+        pcm = _read_wav(file_path)
+    except (wave.Error, EOFError):
+        # 不是 WAV 文件
+        _play_with_pygame(file_path)
+        return
+    except (OSError, ValueError) as e:
+        logger.info(f"播放音频时发生错误: {e}")
+        return
 
+    logger.info(f"正在播放: {os.path.basename(file_path)}")
+    get_playback_engine().play_blocking(pcm)
+
+
+def _read_wav(file_path) -> bytes:
+    """读取 WAV 文件，转换成 24kHz/16bit/单声道 PCM"""
+    with wave.open(file_path, 'rb') as wav:
+        rate, width, channels = wav.getframerate(), wav.getsampwidth(), wav.getnchannels()
+        data = wav.readframes(wav.getnframes())
+    if (rate, width, channels) == (SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS):
+        return data
+
+    if width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif width == 2:
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32)
+    elif width in (3, 4):
+        # 只保留高 16 位
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+        samples = raw[:, -2:].copy().view('<i2').ravel().astype(np.float32)
+    else:
+        raise ValueError(f"unsupported sample width: {width}")
+    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+    if rate != SAMPLE_RATE and len(samples) > 1:
+        # 线性插值重采样，播放提示音足够
+        count = max(1, round(len(samples) * SAMPLE_RATE / rate))
+        positions = np.linspace(0, len(samples) - 1, count)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return np.clip(samples, -32768, 32767).astype('<i2').tobytes()
+
+
+def _play_with_pygame(file_path) -> None:
+    """播放引擎不支持的格式（mp3 等）用 pygame 播放"""
     try:
-        # 加载音频文件
-        pygame.mixer.music.load(file_path)
+        import pygame
+    except ImportError:
+        logger.info(f"不支持的音频格式且未安装 pygame: {os.path.basename(file_path)}")
+        return
 
+    pygame.mixer.init()
+    try:
+        pygame.mixer.music.load(file_path)
         logger.info(f"正在播放: {os.path.basename(file_path)}")
-
-        # 播放音频
         pygame.mixer.music.play()
-
-        # 等待音频播放完成
         while pygame.mixer.music.get_busy():
             time.sleep(0.1)
-
     except pygame.error as e:
         logger.info(f"播放音频时发生错误: {e}")
     finally:
@@ -43,60 +94,118 @@ def play_audio(file_path):
 
 
 class SpeechAssistant:
-    def __init__(self, speech_key, speech_region, output_dir, human):
+    def __init__(self, speech_key, speech_region, output_dir, human, cache_max_bytes=200 * 1024 * 1024,
+                 cache_max_chars=40, synthesizers=2):
         self.speech_key = speech_key
         self.speech_region = speech_region
         self.speech_human = human
         self.output_dir = output_dir
         self.speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.speech_region)
         self.speech_config.speech_synthesis_voice_name = self.speech_human
-
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-
-    def _get_hash(self, text):
-        return hashlib.md5(text.encode()).hexdigest()
-
-    def _get_file_path(self, text):
-        hash_value = self._get_hash(text.strip())
-        return os.path.join(self.output_dir, f"{hash_value}_{self.speech_human}.wav")
-
-    def get_or_create_audio(self, text, save_path=None):
-        if save_path is None:
-            file_path = self._get_file_path(text)
-            if os.path.exists(file_path):
-                logger.info(f"Using existing audio file: {file_path}")
-                return file_path
-        else:
-            file_path = save_path
-        logger.info(f"Generating new audio file: {file_path}")
-        self._generate_audio(text, file_path)
-        return file_path
-
-    def _generate_audio(self, text, file_path):
-        audio_config = speechsdk.audio.AudioOutputConfig(filename=file_path)
-        speech_synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config, audio_config=audio_config)
-        result = speech_synthesizer.speak_text_async(text).get()
+        # 直接输出 PCM，合成结果留在内存中
+        self.speech_config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Raw24Khz16BitMonoPcm)
+        self.cache = AudioCache(self.output_dir, self.speech_human, cache_max_bytes, cache_max_chars)
+        # 常驻的合成器，避免每句话重新建立连接
+        self._synthesizers = queue.Queue()
+        for _ in range(max(1, synthesizers)):
+            self._synthesizers.put(self._create_synthesizer())
+        # 写缓存文件不占用合成线程
+        self.player = get_playback_engine()
+        self.tracer = get_tracer()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-cache")
+        # 同一句话同时只合成一次
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+
+    def _create_synthesizer(self):
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config, audio_config=None)
+        # 预先建立连接，第一句话不用等握手
+        speechsdk.Connection.from_speech_synthesizer(synthesizer).open(True)
+        return synthesizer
+
+    def get_or_create_audio(self, text, save_path=None, persist=None):
+        """返回 text 的 PCM 数据，失败时返回 None
+
+        persist 为 None 时由缓存决定是否写入磁盘。
+        """
+        if save_path is not None:
+            pcm = self._generate_audio(text)
+            if pcm is not None:
+                write_wav(save_path, pcm)
+            return pcm
+
+        pcm = self.cache.get(text)
+        if pcm is not None:
+            logger.info(f"Using cached audio: {text}")
+            return pcm
+
+        key = self.cache.get_key(text)
+        with self._lock_key(key):
+            # 等锁期间可能已由其他线程合成，这次检查不重复计入未命中
+            pcm = self.cache.get(text, count=False)
+            if pcm is not None:
+                return pcm
+            pcm = self._generate_audio(text)
+            if pcm is None:
+                return None
+            self.cache.remember(key, pcm)
+            if persist is None:
+                persist = self.cache.should_persist(text)
+            if persist:
+                self._writer.submit(self.cache.put, key, pcm)
+            return pcm
+
+    def prewarm(self, phrases):
+        """预先合成常用语，之后播放时直接命中缓存"""
+        for phrase in phrases:
+            if phrase and not self.cache.contains(phrase):
+                self.get_or_create_audio(phrase, persist=True)
+
+    @contextmanager
+    def _lock_key(self, key):
+        """同一句话的合成互斥；锁按使用者计数，没人等待时移除，避免无限增长"""
+        with self._key_locks_lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._key_locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def _generate_audio(self, text):
+        synthesizer = self._synthesizers.get()
+        try:
+            with self.tracer.span("tts_synthesis"):
+                result = synthesizer.speak_text_async(text).get()
+        finally:
+            self._synthesizers.put(synthesizer)
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            logger.info(f"Speech synthesized and saved to file '{file_path}'")
+            logger.info(f"Speech synthesized: {text}")
+            return result.audio_data
         elif result.reason == speechsdk.ResultReason.Canceled:
             cancellation_details = result.cancellation_details
             logger.warning("Speech synthesis canceled: {}".format(cancellation_details.reason))
             if cancellation_details.reason == speechsdk.CancellationReason.Error:
                 if cancellation_details.error_details:
                     logger.error("Error details: {}".format(cancellation_details.error_details))
+        return None
 
     def play_sound(self, text):
-        pygame.mixer.init()
-        file_path = self.get_or_create_audio(text)
-        try:
-            pygame.mixer.music.load(file_path)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-        except pygame.error as e:
-            logger.info(f"Error playing sound: {e}")
+        pcm = self.get_or_create_audio(text)
+        if pcm:
+            self.play_pcm(pcm)
+
+    def play_pcm(self, pcm):
+        """播放 PCM 数据并等待结束"""
+        self.player.play_blocking(pcm)
 
     def get_hear_text(self):
         # Creates a recognizer with the given settings
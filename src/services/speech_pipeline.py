@@ -0,0 +1,158 @@
+# src/services/speech_pipeline.py
+import asyncio
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from services.tracing import get_tracer
+from utils import get_logger
+
+if TYPE_CHECKING:
+    from services.speech_assistant import SpeechAssistant
+
+logger = get_logger("speech_pipeline")
+
+# 句末标点：遇到这些字符即可认为一句话结束
+SENTENCE_TERMINATORS = "。！？!?；;…\n"
+# 紧跟在句末标点后面、应归属于同一句的闭合符号
+CLOSING_MARKS = "”’\"'」』）)】"
+
+
+class SentenceSplitter:
+    """按中英文句子边界切分流式文本"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """追加增量文本，返回已经完整的句子"""
+        self._buffer += delta
+        sentences = []
+        start = 0
+        i = 0
+        length = len(self._buffer)
+        while i < length:
+            ch = self._buffer[i]
+            if ch == '.':
+                # 英文句号后（可带引号）需要跟空白才算句末，避免切开小数和缩写
+                j = i + 1
+                while j < length and self._buffer[j] in CLOSING_MARKS:
+                    j += 1
+                if j >= length:
+                    break
+                if not self._buffer[j].isspace():
+                    i += 1
+                    continue
+            elif ch not in SENTENCE_TERMINATORS:
+                i += 1
+                continue
+
+            end = i + 1
+            while end < length and (self._buffer[end] in SENTENCE_TERMINATORS or self._buffer[end] in CLOSING_MARKS):
+                end += 1
+            if end == length and ch != '\n':
+                # 可能还有后续的标点或引号，等待更多文本
+                break
+            self._append(sentences, self._buffer[start:end])
+            start = i = end
+
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """返回缓冲区中剩余的文本"""
+        sentences = []
+        self._append(sentences, self._buffer)
+        self._buffer = ""
+        return sentences
+
+    @staticmethod
+    def _append(sentences: List[str], text: str) -> None:
+        text = text.strip()
+        # 只含标点的片段没有可朗读的内容
+        if any(ch.isalnum() for ch in text):
+            sentences.append(text)
+
+
+class SpeechPipeline:
+    """流式文本 -> 分句合成 -> 顺序播放 的语音流水线
+
+    每个句子完整后立即提交合成，合成好的音频直接排入播放引擎，
+    下一句的合成与当前句的播放并行进行，句与句之间没有间隙。
+    """
+
+    def __init__(self, speaker: "SpeechAssistant"):
+        self.speaker = speaker
+        self.player = speaker.player
+        self.splitter = SentenceSplitter()
+        self._sentences: asyncio.Queue = asyncio.Queue()
+        # 已排入播放的 (句子, 音频字节数, 播放 Future)
+        self._playing: List[Tuple[str, int, Future]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.tracer = get_tracer()
+        # 各阶段耗时都从流水线创建（即用户说完）开始算
+        self._created = time.perf_counter()
+
+    async def __aenter__(self) -> "SpeechPipeline":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.finish()
+        else:
+            await self.cancel()
+
+    def start(self) -> None:
+        """启动合成任务"""
+        self._task = asyncio.create_task(self._synthesize_worker())
+
+    def feed(self, delta: str) -> None:
+        """输入模型生成的增量文本"""
+        for sentence in self.splitter.feed(delta):
+            self._sentences.put_nowait(sentence)
+
+    async def finish(self) -> None:
+        """提交剩余文本并等待全部播放完成"""
+        for sentence in self.splitter.flush():
+            self._sentences.put_nowait(sentence)
+        self._sentences.put_nowait(None)
+        await self._task
+        if self._playing:
+            await asyncio.wrap_future(self._playing[-1][2])
+            self.tracer.record("playback_end", time.perf_counter() - self._created)
+
+    async def cancel(self) -> None:
+        """停止合成与播放"""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        if any(not future.done() for _, _, future in self._playing):
+            self.player.stop()
+
+    def spoken_text(self) -> str:
+        """已经播放出来的文本，最后一句按播放进度截取"""
+        parts = []
+        for sentence, size, future in self._playing:
+            played = future.result() if future.done() else 0
+            if played >= size:
+                parts.append(sentence)
+                continue
+            if played > 0:
+                parts.append(sentence[:round(len(sentence) * played / size)])
+            break
+        return "".join(parts)
+
+    async def _synthesize_worker(self) -> None:
+        while True:
+            sentence: Optional[str] = await self._sentences.get()
+            if sentence is None:
+                return
+            try:
+                pcm = await asyncio.to_thread(self.speaker.get_or_create_audio, sentence)
+            except Exception as e:
+                logger.error(f"Speech synthesis failed: {e}")
+                continue
+            if pcm:
+                if not self._playing:
+                    self.tracer.record("first_audio", time.perf_counter() - self._created)
+                self._playing.append((sentence, len(pcm), self.player.play(pcm)))
@@ -0,0 +1,98 @@
+# src/services/summarizer.py
+import asyncio
+import re
+from typing import Callable, Dict, List, Optional
+
+from models.conversation import Conversation
+from services.base_ai import AbstractChatBot
+from services.scheduler import Priority
+from utils import get_logger
+
+logger = get_logger("summarizer")
+
+SUMMARY_INSTRUCTION = """你负责为一段角色扮演对话维护长期记忆摘要。
+请把"已有摘要"和"新的对话"合并成一份新的摘要：
+- 保留用户的个人信息、喜好、习惯、重要事件和双方的约定
+- 保留角色已经说过的关键事实，避免之后前后矛盾
+- 删除寒暄和重复内容，使用第三人称，不超过 300 字
+只输出摘要本身。"""
+
+ROLE_NAMES = {"user": "用户", "assistant": "角色"}
+
+# 推理模型会在回复前输出 <think>...</think>
+THINK_PATTERN = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+class ConversationCompactor:
+    """对话记忆压缩器
+
+    对话超过阈值时，在后台任务中把最旧的一段对话与已有摘要合并成新摘要，
+    再替换进对话历史。每次只处理新的一段对话，不会重新总结全部历史。
+    """
+
+    def __init__(self, bot: AbstractChatBot, threshold_tokens: int, block_turns: int = 4,
+                 max_tokens: int = 600, on_compacted: Optional[Callable[[Conversation], None]] = None):
+        self.bot = bot
+        self.on_compacted = on_compacted
+        self.threshold_tokens = threshold_tokens
+        self.block_turns = block_turns
+        self.max_tokens = max_tokens
+        self._task: Optional[asyncio.Task] = None
+
+    def maybe_compact(self, conversation: Conversation) -> None:
+        """超过阈值时启动后台压缩，不等待其完成"""
+        if self.threshold_tokens <= 0 or self.is_running():
+            return
+        if conversation.get_token_count() < self.threshold_tokens:
+            return
+
+        block = conversation.get_oldest_turns(self.block_turns)
+        if not block:
+            return
+        self._task = asyncio.create_task(self._compact(conversation, block))
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def cancel(self) -> None:
+        """取消进行中的压缩"""
+        if self.is_running():
+            self._task.cancel()
+        self._task = None
+
+    async def wait(self) -> None:
+        """等待进行中的压缩完成"""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _compact(self, conversation: Conversation, block: List[Dict[str, str]]) -> None:
+        try:
+            summary = await self.summarize(conversation.summary, block)
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}")
+            return
+
+        if not summary:
+            return
+        if conversation.compact(block, summary):
+            logger.info(f"Compacted {len(block)} messages into summary")
+            if self.on_compacted:
+                self.on_compacted(conversation)
+
+    async def summarize(self, previous: Optional[str], block: List[Dict[str, str]]) -> str:
+        """把已有摘要和一段新对话合并成新的摘要"""
+        dialogue = "\n".join(
+            f"{ROLE_NAMES.get(message['role'], message['role'])}：{message['content']}"
+            for message in block
+        )
+        content = f"已有摘要：\n{previous or '（无）'}\n\n新的对话：\n{dialogue}"
+        response = await self.bot.send_message(
+            messages=[
+                {"role": "system", "content": SUMMARY_INSTRUCTION},
+                {"role": "user", "content": content}
+            ],
+            temperature=0.3,
+            max_tokens=self.max_tokens,
+            priority=Priority.BACKGROUND
+        )
+        return THINK_PATTERN.sub("", response or "").strip()
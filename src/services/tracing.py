@@ -0,0 +1,125 @@
+# src/services/tracing.py
+import json
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import ContextManager, Deque, Dict, Optional
+
+from config.config_manager import config_manager
+from utils import get_logger
+
+logger = get_logger("tracing")
+
+# 关闭追踪时所有 span 共用的空上下文
+_NOOP_SPAN = nullcontext()
+
+
+class LatencyHistogram:
+    """单个阶段的耗时分布，分位数基于最近 window 个样本"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / max(1, self.count) * 1000, 1),
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "start")
+
+    def __init__(self, tracer: "Tracer", stage: str):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.tracer.record(self.stage, time.perf_counter() - self.start)
+
+
+class Tracer:
+    """按阶段汇总一轮对话各环节的耗时
+
+    阶段包括 asr_final、context_hints、llm_ttft、llm_total、tts_synthesis、
+    first_audio、playback_end、turn_total 等。关闭时 span() 返回共享的空上下文，
+    record() 直接返回，几乎没有开销。
+    """
+
+    def __init__(self, enabled: bool = True, window: int = 1000):
+        self.enabled = enabled
+        self.window = window
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str) -> ContextManager:
+        """计时一段代码，退出时记入 stage 的分布"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram(self.window))
+        histogram.record(seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {stage: histogram.snapshot() for stage, histogram in sorted(self._histograms.items())}
+
+    def dump(self, path: Optional[str] = None) -> None:
+        """将各阶段的分布写入日志，指定 path 时同时写入文件"""
+        if not self.enabled or not self._histograms:
+            return
+        report = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        logger.info(f"Latency by stage:\n{report}")
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(report)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """获取共享的追踪器，TRACING=true 时启用"""
+    global _tracer
+    if _tracer is None:
+        # 启动时各组件在不同线程中并行初始化
+        with _tracer_lock:
+            if _tracer is None:
+                enabled = config_manager.get_config_value('TRACING', 'false').lower() == 'true'
+                window = int(config_manager.get_config_value('TRACE_WINDOW', '1000'))
+                _tracer = Tracer(enabled, window)
+    return _tracer
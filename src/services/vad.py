@@ -0,0 +1,125 @@
+# src/services/vad.py
+from enum import Enum
+from typing import List
+
+import numpy as np
+
+
+class VadEvent(Enum):
+    SPEECH_START = "speech_start"
+    SPEECH_END = "speech_end"
+
+
+class EnergyVAD:
+    """基于短时能量和过零率的语音端点检测
+
+    输入 16 位单声道 PCM，按固定帧长切分后批量计算每帧的能量（dBFS）和过零率。
+    能量明显高于自适应噪声底的帧判为语音；能量稍低但过零率落在清辅音范围内的帧
+    也算语音，避免切掉“s”“sh”之类的音。连续 start_ms 的语音帧判定开始说话，
+    短于 start_ms 的响声（咳嗽、敲击）被忽略；语音后连续 trailing_silence_ms 的
+    静音判定说完。is_speech 是逐帧的平滑判决，最后一个语音帧之后 hangover_ms
+    内仍为真，适合用来判断用户是否正在说话。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30,
+                 trailing_silence_ms: int = 500, start_ms: int = 90, hangover_ms: int = 200,
+                 margin_db: float = 12.0, min_energy_db: float = -50.0,
+                 zcr_range: tuple = (0.1, 0.5)):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = hangover_ms // frame_ms
+        self.trailing_frames = max(1, trailing_silence_ms // frame_ms)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.zcr_range = zcr_range
+        self.noise_floor_db = min_energy_db - margin_db
+        # 预分配的缓冲区：不足一帧的剩余采样，以及批量计算特征用的工作数组
+        self._pending = np.empty(self.frame_samples, dtype=np.int16)
+        self._pending_len = 0
+        self._work = np.empty((0, self.frame_samples), dtype=np.float32)
+        self._signs = np.empty((0, self.frame_samples), dtype=bool)
+        self._crossings = np.empty((0, self.frame_samples - 1), dtype=bool)
+        self.reset()
+
+    def reset(self) -> None:
+        """开始检测新的一句话，保留已学习的噪声底"""
+        self.in_speech = False
+        self.is_speech = False
+        self._pending_len = 0
+        self._speech_run = 0
+        self._silence_run = self.hangover_frames + 1
+
+    def feed(self, pcm) -> List[VadEvent]:
+        """输入任意长度的 PCM（bytes 或 memoryview），返回其中检测到的端点事件
+
+        数据不会被复制或拼接：先用输入补齐上次剩下的半帧，其余整帧直接在输入上计算。
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        events: List[VadEvent] = []
+        if self._pending_len:
+            take = min(len(samples), self.frame_samples - self._pending_len)
+            self._pending[self._pending_len:self._pending_len + take] = samples[:take]
+            self._pending_len += take
+            samples = samples[take:]
+            if self._pending_len < self.frame_samples:
+                return events
+            self._pending_len = 0
+            self._analyze(self._pending.reshape(1, self.frame_samples), events)
+
+        count = len(samples) // self.frame_samples
+        if count:
+            self._analyze(samples[:count * self.frame_samples].reshape(count, self.frame_samples), events)
+        rest = len(samples) - count * self.frame_samples
+        self._pending[:rest] = samples[count * self.frame_samples:]
+        self._pending_len = rest
+        return events
+
+    def _analyze(self, frames: np.ndarray, events: List[VadEvent]) -> None:
+        count = len(frames)
+        if len(self._work) < count:
+            self._work = np.empty((count, self.frame_samples), dtype=np.float32)
+            self._signs = np.empty((count, self.frame_samples), dtype=bool)
+            self._crossings = np.empty((count, self.frame_samples - 1), dtype=bool)
+        work = np.multiply(frames, frames, out=self._work[:count], dtype=np.float32)
+        rms = np.sqrt(work.mean(axis=1)) / 32768.0
+        energy_db = 20 * np.log10(rms + 1e-10)
+        signs = np.signbit(frames, out=self._signs[:count])
+        crossings = np.not_equal(signs[:, 1:], signs[:, :-1], out=self._crossings[:count])
+        zcr = np.count_nonzero(crossings, axis=1) / (self.frame_samples - 1)
+
+        for energy, crossing in zip(energy_db.tolist(), zcr.tolist()):
+            event = self._update(energy, crossing)
+            if event is not None:
+                events.append(event)
+
+    def _is_speech(self, energy: float, zcr: float) -> bool:
+        threshold = max(self.min_energy_db, self.noise_floor_db + self.margin_db)
+        if energy >= threshold:
+            return True
+        # 清辅音能量低、过零率高
+        return (energy >= threshold - self.margin_db / 2
+                and self.zcr_range[0] <= zcr <= self.zcr_range[1])
+
+    def _update(self, energy: float, zcr: float):
+        speech = self._is_speech(energy, zcr)
+        self._silence_run = 0 if speech else self._silence_run + 1
+        self.is_speech = self._silence_run <= self.hangover_frames
+        if not speech:
+            # 只在非语音帧上更新噪声底，下降快、上升慢
+            alpha = 0.3 if energy < self.noise_floor_db else 0.02
+            self.noise_floor_db += alpha * (energy - self.noise_floor_db)
+
+        if not self.in_speech:
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.start_frames:
+                self.in_speech = True
+                return VadEvent.SPEECH_START
+            return None
+
+        if self._silence_run >= self.trailing_frames:
+            self.in_speech = False
+            self._speech_run = 0
+            return VadEvent.SPEECH_END
+        return None
@@ -1,13 +1,29 @@
+import asyncio
 import os
+import time
+from typing import Optional
 
+import numpy as np
 import vosk
-import pyaudio
 import json
 
+from config.config_manager import config_manager
+from services.audio_capture import AudioCapture, CaptureReader, SAMPLE_RATE, get_audio_capture
+from services.tracing import get_tracer
+from services.vad import EnergyVAD, VadEvent
+
+# 每次读取 100ms，端点检测的响应粒度
+CHUNK_FRAMES = 1600
+PREROLL_CHUNKS = 3
+
 
 class ChineseVoiceRecognizer:
-    def __init__(self):
-        """初始化语音检测器"""
+    def __init__(self, capture: Optional[AudioCapture] = None):
+        """初始化语音检测器
+
+        Args:
+            capture: 音频来源，默认为共享的麦克风采集
+        """
         # 加载中文模型
         vosk.SetLogLevel(-1)  # 禁用日志
         script_dir = os.path.dirname(__file__)
@@ -18,46 +34,75 @@ class ChineseVoiceRecognizer:
         if os.path.exists(model_path) and os.path.isdir(model_path):
             print(f"使用模型路径: {model_path}")
             self.model = vosk.Model(model_path)
-            self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
+            self.recognizer = vosk.KaldiRecognizer(self.model, SAMPLE_RATE)
         else:
             raise FileNotFoundError(f"模型目录不存在: {model_path}")
 
-        # 音频设置
-        self.audio = pyaudio.PyAudio()
-
-    def get_speech_text(self) -> str:
-        """开始录音并等待说话结束"""
-        stream = self.audio.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=16000,
-            input=True,
-            frames_per_buffer=8000
+        # 本地端点检测：检测到说完后立即取最终结果，不等 Kaldi 自己判断
+        self.vad = EnergyVAD(
+            sample_rate=SAMPLE_RATE,
+            trailing_silence_ms=int(config_manager.get_config_value('VAD_TRAILING_SILENCE_MS', '500')),
+            margin_db=float(config_manager.get_config_value('VAD_MARGIN_DB', '12'))
         )
-        stream.start_stream()
+        # 开始说话前保留的音频，避免丢掉第一个字；固定大小的环形数组，静音时不分配内存
+        self.preroll = np.empty((PREROLL_CHUNKS, CHUNK_FRAMES), dtype=np.int16)
+        self._preroll_count = 0
+        self.tracer = get_tracer()
 
+        # 音频设置：持续采集，两次识别之间说的话也会保留
+        self.capture = capture or get_audio_capture()
+        self.reader: Optional[CaptureReader] = None
+
+    def get_speech_text(self, timeout: Optional[float] = None) -> str:
+        """等待说话结束并返回识别结果，timeout 秒内没有新音频时返回空字符串"""
+        reader = self._get_reader()
         print("开始说话...")
-        recognized_text = ""
-
-        try:
-            while True:
-                data = stream.read(4000)
-                if len(data) == 0:
-                    break
-
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get("text", "")
-                    if text:
-                        recognized_text = text
-                        print(f"识别到的文本: {text}")
-                        break
-        finally:
-            stream.stop_stream()
-            stream.close()
-
-        return recognized_text
-
-    def __del__(self):
-        if hasattr(self, "audio"):
-            self.audio.terminate()
\ No newline at end of file
+        while True:
+            data = reader.read(timeout)
+            if data is None:
+                return ""
+            recognized_text = self.accept_audio(data)
+            if recognized_text:
+                print(f"识别到的文本: {recognized_text}")
+                return recognized_text
+
+    async def listen(self) -> str:
+        """异步等待下一句话，识别在线程中进行，不阻塞事件循环"""
+        reader = self._get_reader()
+        while True:
+            data = await reader.read_async()
+            recognized_text = await asyncio.to_thread(self.accept_audio, data)
+            if recognized_text:
+                return recognized_text
+
+    def _get_reader(self) -> CaptureReader:
+        if self.reader is None:
+            self.reader = self.capture.reader(CHUNK_FRAMES)
+        return self.reader
+
+    def accept_audio(self, data) -> str:
+        """输入一段音频，一句话结束时返回识别结果，否则返回空字符串"""
+        events = self.vad.feed(data)
+        if not self.vad.in_speech and not events:
+            # 还没开始说话，静音不送入识别器；读取缓冲区会被复用，复制到预分配的数组中
+            self.preroll[self._preroll_count % PREROLL_CHUNKS] = np.frombuffer(data, dtype=np.int16)
+            self._preroll_count += 1
+            return ""
+        if self._preroll_count:
+            oldest = max(0, self._preroll_count - PREROLL_CHUNKS)
+            for i in range(oldest, self._preroll_count):
+                self.recognizer.AcceptWaveform(self.preroll[i % PREROLL_CHUNKS].tobytes())
+            self._preroll_count = 0
+
+        started = time.perf_counter()
+        # vosk 的 cffi 接口只接受 bytes，说话期间每块仍需复制一次
+        if self.recognizer.AcceptWaveform(bytes(data)):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+        elif VadEvent.SPEECH_END in events:
+            text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        else:
+            return ""
+        self.tracer.record("asr_final", time.perf_counter() - started)
+        if text:
+            self.vad.reset()
+        return text